@@ -0,0 +1,41 @@
+import hashlib
+import msgpack
+from fastapi import Request, Response
+
+# Timestamps that change on every recompute without the data moving
+VOLATILE_FIELDS = ('last_updated',)
+
+
+def _strip_volatile(payload):
+    if isinstance(payload, dict):
+        return {k: v for k, v in payload.items() if k not in VOLATILE_FIELDS}
+    if isinstance(payload, list):
+        return [_strip_volatile(item) for item in payload]
+    return payload
+
+
+def content_etag(payload) -> str:
+    """Weak ETag over the payload's values, so it only changes when the data moves"""
+    packed = msgpack.packb(_strip_volatile(payload), default=str)
+    return f'W/"{hashlib.sha1(packed).hexdigest()[:20]}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already matches `etag`"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or etag.removeprefix('W/') in candidates
+
+
+def set_cache_headers(response: Response, etag: str):
+    # no-cache lets browsers keep the body but revalidate with If-None-Match on every poll
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+
+
+def not_modified_response(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
@@ -1,32 +1,106 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database.session import get_db
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Response
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, load_only
+from app.database.session import get_db, SessionLocal
 from app.models.screenshots import Screenshot
-from app.schemas.screenshot import ScreenshotUploadResponse, AIAnalysisResponse, ScreenshotResponse
-from app.services.ocr_service import ocr_service
+from app.schemas.screenshot import (
+    ScreenshotUploadResponse, OCRStatusResponse, AIAnalysisResponse, ScreenshotResponse,
+    BulkAnalysisRequest, BulkAnalysisItem, BulkAnalysisResponse, AnalysisCacheStats,
+    ScreenshotSummary, ScreenshotPage,
+)
+from app.tasks import ocr_worker
 from app.services.ai_service import ai_service
+from app.services.analysis_cache import analysis_cache, AnalysisCacheService
+from app.services.image_hash import content_hash, dhash, dhash_bands, dhash_band_probes, hamming_distance
 from datetime import datetime
+import asyncio
+import base64
 import os
 import uuid
-from typing import List
+from typing import Optional
 from app.config import get_settings
 
 settings = get_settings()
 router = APIRouter()
 
 
-@router.post("/upload", response_model=ScreenshotUploadResponse)
+def _write_file(file_path: str, content: bytes):
+    with open(file_path, "wb") as buffer:
+        buffer.write(content)
+
+
+def _hash_upload(content: bytes) -> tuple[str, int]:
+    return content_hash(content), dhash(content)
+
+
+def _find_near_duplicate(db: Session, phash: int) -> Optional[int]:
+    """
+    Closest earlier screenshot within SCREENSHOT_NEAR_DUPLICATE_DISTANCE bits of `phash`.
+    Only screenshots with a band close enough to match (GIN index) are compared, in Python.
+    """
+    probes = dhash_band_probes(phash, settings.SCREENSHOT_NEAR_DUPLICATE_DISTANCE)
+    candidates = (
+        db.query(Screenshot.id, Screenshot.phash)
+        .filter(Screenshot.phash_band_keys.overlap(probes))
+        .all()
+    )
+    best = min(
+        ((hamming_distance(phash, row.phash), row.id) for row in candidates),
+        default=None,
+    )
+    if best is None or best[0] > settings.SCREENSHOT_NEAR_DUPLICATE_DISTANCE:
+        return None
+    return best[1]
+
+
+@router.post("/upload", response_model=ScreenshotUploadResponse, status_code=202)
 async def upload_screenshot(
+    response: Response,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
     """
-    Upload screenshot and extract text using OCR (free)
+    Upload screenshot and queue OCR text extraction (free).
+    Returns immediately; poll /{screenshot_id}/status for the result.
+    A byte-identical re-upload returns the existing screenshot (200) with its
+    OCR/AI results instead of storing and processing the file again.
     """
     # Validate file type
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
 
+    content = await file.read()
+    try:
+        digest, phash = await asyncio.to_thread(_hash_upload, content)
+    except Exception:
+        raise HTTPException(status_code=400, detail="File is not a readable image")
+
+    existing = (
+        db.query(Screenshot)
+        .filter(Screenshot.content_hash == digest)
+        .order_by(Screenshot.id)
+        .first()
+    )
+    if existing:
+        if existing.ocr_status == ocr_worker.FAILED:
+            # Same file again: give the failed extraction another try instead of a new row
+            existing.ocr_status = ocr_worker.PENDING
+            existing.ocr_error = None
+            db.commit()
+            ocr_worker.enqueue_ocr(existing.id, existing.image_path)
+
+        response.status_code = 200
+        return ScreenshotUploadResponse(
+            id=existing.id,
+            ocr_status=existing.ocr_status,
+            upload_timestamp=existing.upload_timestamp,
+            duplicate=True,
+            near_duplicate_of=existing.near_duplicate_of,
+            screenshot=ScreenshotResponse.model_validate(existing),
+        )
+
+    near_duplicate_of = _find_near_duplicate(db, phash)
+
     # Generate unique filename
     file_extension = os.path.splitext(file.filename)[1] or '.png'
     unique_filename = f"{uuid.uuid4()}{file_extension}"
@@ -37,39 +111,149 @@ async def upload_screenshot(
 
     # Save file
     try:
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await asyncio.to_thread(_write_file, file_path, content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
 
-    # Extract text using OCR (free)
-    extracted_text = ocr_service.extract_text_from_screenshot(file_path)
-
-    # Extract tickers
-    tickers = ocr_service.extract_tickers(extracted_text)
-
-    # Extract investment thesis
-    investment_thesis = ocr_service.extract_investment_thesis(extracted_text)
-
-    # Save to database
+    # Save to database, then run OCR in the background worker pool
     screenshot = Screenshot(
         image_path=file_path,
-        extracted_text=extracted_text,
-        tickers_mentioned=tickers,
-        investment_thesis=investment_thesis,
+        ocr_status=ocr_worker.PENDING,
+        tickers_mentioned=[],
+        content_hash=digest,
+        phash=phash,
+        phash_band_keys=dhash_bands(phash),
+        near_duplicate_of=near_duplicate_of,
     )
 
     db.add(screenshot)
     db.commit()
     db.refresh(screenshot)
 
+    ocr_worker.enqueue_ocr(screenshot.id, file_path)
+
     return ScreenshotUploadResponse(
         id=screenshot.id,
-        extracted_text=extracted_text,
-        tickers_mentioned=tickers,
-        investment_thesis=investment_thesis,
+        ocr_status=screenshot.ocr_status,
         upload_timestamp=screenshot.upload_timestamp,
+        near_duplicate_of=near_duplicate_of,
+    )
+
+
+@router.get("/{screenshot_id}/status", response_model=OCRStatusResponse)
+async def get_ocr_status(screenshot_id: int, db: Session = Depends(get_db)):
+    """OCR job status, with the extracted text and tickers once done"""
+    screenshot = db.query(Screenshot).filter(Screenshot.id == screenshot_id).first()
+    if not screenshot:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+
+    return screenshot
+
+
+def _apply_analysis(screenshot: Screenshot, result: dict):
+    screenshot.ai_analyzed = True
+    screenshot.ai_analysis = result['analysis']
+    screenshot.recommendation = result['recommendation']
+    screenshot.risk_rating = result['risk_rating']
+    screenshot.analysis_cost = result['cost']
+    screenshot.analyzed_at = datetime.now()
+
+
+def _store_analysis(screenshot_id: int, result: dict):
+    db = SessionLocal()
+    try:
+        screenshot = db.query(Screenshot).filter(Screenshot.id == screenshot_id).first()
+        if screenshot:
+            _apply_analysis(screenshot, result)
+            db.commit()
+    finally:
+        db.close()
+
+
+@router.post("/analyze", response_model=BulkAnalysisResponse)
+async def analyze_screenshots(request: BulkAnalysisRequest, db: Session = Depends(get_db)):
+    """
+    AI analysis for several screenshots (paid, ~$0.10-0.25 each): the given ids,
+    or the oldest AI_BULK_MAX screenshots with non-empty extracted text and no analysis yet.
+    Up to AI_CONCURRENCY run at once; each result is saved as soon as it arrives.
+    """
+    if not ai_service.enabled:
+        raise HTTPException(status_code=503, detail="AI analysis is disabled. Set ANTHROPIC_API_KEY to enable.")
+
+    query = db.query(
+        Screenshot.id, Screenshot.ocr_status, Screenshot.ai_analyzed,
+        Screenshot.extracted_text, Screenshot.tickers_mentioned,
+    )
+    if request.ids is not None:
+        if len(request.ids) > settings.AI_BULK_MAX:
+            raise HTTPException(status_code=400, detail=f"At most {settings.AI_BULK_MAX} screenshots per request")
+        rows = query.filter(Screenshot.id.in_(request.ids)).all()
+    else:
+        rows = (
+            query.filter(
+                Screenshot.ocr_status == ocr_worker.DONE,
+                Screenshot.ai_analyzed.isnot(True),
+                # OCR found nothing to analyze (blank or image-only screenshots)
+                Screenshot.extracted_text.regexp_match(r'\S'),
+            )
+            .order_by(Screenshot.upload_timestamp)
+            .limit(settings.AI_BULK_MAX)
+            .all()
+        )
+
+    items = {}
+    found = {row.id for row in rows}
+    for screenshot_id in request.ids or []:
+        if screenshot_id not in found:
+            items[screenshot_id] = BulkAnalysisItem(id=screenshot_id, status='skipped', error="Screenshot not found")
+
+    todo = []
+    for row in rows:
+        if row.ai_analyzed:
+            items[row.id] = BulkAnalysisItem(id=row.id, status='skipped', error="Already analyzed")
+        elif row.ocr_status != ocr_worker.DONE:
+            items[row.id] = BulkAnalysisItem(id=row.id, status='skipped', error=f"OCR is {row.ocr_status}")
+        elif not (row.extracted_text or '').strip():
+            items[row.id] = BulkAnalysisItem(id=row.id, status='skipped', error="No text extracted")
+        else:
+            todo.append(row)
+
+    async def run(row) -> BulkAnalysisItem:
+        # One screenshot failing (e.g. a database error) must not fail the others
+        try:
+            result = await analysis_cache.analyze(row.extracted_text, row.tickers_mentioned or [])
+        except Exception as e:
+            print(f"AI analysis failed for screenshot {row.id}: {e}")
+            return BulkAnalysisItem(id=row.id, status='failed', error=str(e)[:500])
+        if 'error' in result:
+            return BulkAnalysisItem(id=row.id, status='failed', error=result['error'])
+
+        try:
+            await asyncio.to_thread(_store_analysis, row.id, result)
+        except Exception as e:
+            # The analysis was paid for, so its cost is still reported
+            print(f"Could not save AI analysis for screenshot {row.id}: {e}")
+            return BulkAnalysisItem(id=row.id, status='failed', analysis_cost=result['cost'], error=str(e)[:500])
+        return BulkAnalysisItem(
+            id=row.id,
+            status='analyzed',
+            recommendation=result['recommendation'],
+            risk_rating=result['risk_rating'],
+            analysis_cost=result['cost'],
+            cached=result.get('cached', False),
+        )
+
+    for next_done in asyncio.as_completed([run(row) for row in todo]):
+        item = await next_done
+        items[item.id] = item
+
+    results = [items[screenshot_id] for screenshot_id in sorted(items)]
+    return BulkAnalysisResponse(
+        results=results,
+        analyzed=sum(item.status == 'analyzed' for item in results),
+        failed=sum(item.status == 'failed' for item in results),
+        skipped=sum(item.status == 'skipped' for item in results),
+        total_cost=round(sum(item.analysis_cost or 0 for item in results), 4),
     )
 
 
@@ -85,6 +269,9 @@ async def analyze_screenshot(
     if not screenshot:
         raise HTTPException(status_code=404, detail="Screenshot not found")
 
+    if screenshot.ocr_status != ocr_worker.DONE:
+        raise HTTPException(status_code=409, detail=f"OCR is {screenshot.ocr_status}, analysis needs extracted text")
+
     if screenshot.ai_analyzed:
         # Already analyzed, return cached result
         return AIAnalysisResponse(
@@ -97,7 +284,8 @@ async def analyze_screenshot(
         )
 
     # Run AI analysis
-    result = await ai_service.deep_analysis(
+    # Reuses the analysis of identical or near-identical content at no cost
+    result = await analysis_cache.analyze(
         screenshot.extracted_text,
         screenshot.tickers_mentioned or []
     )
@@ -106,13 +294,7 @@ async def analyze_screenshot(
         raise HTTPException(status_code=500, detail=result['error'])
 
     # Update database
-    screenshot.ai_analyzed = True
-    screenshot.ai_analysis = result['analysis']
-    screenshot.recommendation = result['recommendation']
-    screenshot.risk_rating = result['risk_rating']
-    screenshot.analysis_cost = result['cost']
-    screenshot.analyzed_at = datetime.now()
-
+    _apply_analysis(screenshot, result)
     db.commit()
     db.refresh(screenshot)
 
@@ -123,14 +305,64 @@ async def analyze_screenshot(
         risk_rating=screenshot.risk_rating,
         analysis_cost=screenshot.analysis_cost,
         analyzed_at=screenshot.analyzed_at,
+        cached=result.get('cached', False),
     )
 
 
-@router.get("", response_model=List[ScreenshotResponse])
-async def get_screenshots(db: Session = Depends(get_db)):
-    """Get all screenshots with their analysis status"""
-    screenshots = db.query(Screenshot).order_by(Screenshot.upload_timestamp.desc()).all()
-    return screenshots
+@router.get("/analysis-cache/stats", response_model=AnalysisCacheStats)
+async def get_analysis_cache_stats(db: Session = Depends(get_db)):
+    """AI result cache hits, misses and the analysis cost they saved"""
+    return AnalysisCacheService.stats(db)
+
+
+# Columns of the history list; extracted_text and ai_analysis load with the single screenshot
+SUMMARY_COLUMNS = (
+    Screenshot.id, Screenshot.image_path, Screenshot.upload_timestamp, Screenshot.near_duplicate_of,
+    Screenshot.ocr_status, Screenshot.ocr_error, Screenshot.tickers_mentioned, Screenshot.investment_thesis,
+    Screenshot.ai_analyzed, Screenshot.recommendation, Screenshot.risk_rating,
+    Screenshot.analysis_cost, Screenshot.analyzed_at,
+)
+
+
+def encode_cursor(screenshot: Screenshot) -> str:
+    """Opaque position after `screenshot` in (upload_timestamp, id) order"""
+    raw = f"{screenshot.upload_timestamp.isoformat()}|{screenshot.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        timestamp, screenshot_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(screenshot_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("", response_model=ScreenshotPage)
+async def get_screenshots(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Screenshots with their analysis status, newest first, one page at a time.
+    Pass next_cursor back as `cursor` for the following page; it is null on the last one.
+    """
+    query = db.query(Screenshot).options(load_only(*SUMMARY_COLUMNS))
+    if cursor:
+        # Row comparison walks the (upload_timestamp, id) index from the cursor position
+        query = query.filter(tuple_(Screenshot.upload_timestamp, Screenshot.id) < decode_cursor(cursor))
+
+    rows = (
+        query.order_by(Screenshot.upload_timestamp.desc(), Screenshot.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    items = rows[:limit]
+    return ScreenshotPage(
+        items=items,
+        next_cursor=encode_cursor(items[-1]) if len(rows) > limit else None,
+    )
 
 
 @router.get("/{screenshot_id}", response_model=ScreenshotResponse)
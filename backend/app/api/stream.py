@@ -0,0 +1,62 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.services.analysis_service import analysis_service
+from app.services.stream_service import stream_broker
+
+router = APIRouter()
+
+# Comment lines keep proxies from closing idle streams
+HEARTBEAT_SECONDS = 15
+MAX_SYMBOLS = 200
+
+
+def _format_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.get("")
+async def stream_updates(symbols: str = Query(..., description="Comma-separated symbols")):
+    """
+    Server-sent events for a set of symbols.
+    Sends a `snapshot` event with the current StockData list, then an `update`
+    event with the changed fields whenever a symbol is recomputed.
+    """
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbol_list) > MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SYMBOLS} symbols per stream")
+
+    async def events():
+        # Subscribe before reading the snapshot so no update falls in between
+        queue = stream_broker.subscribe(symbol_list)
+        try:
+            snapshot = await analysis_service.get_many(symbol_list)
+            for data in snapshot:
+                stream_broker.remember(data['symbol'], data)
+            yield _format_event('snapshot', json.dumps(snapshot, default=str))
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if event is None:
+                    break
+                yield _format_event(*event)
+        finally:
+            stream_broker.unsubscribe(symbol_list, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            # Keeps nginx from buffering events (the app's gzip middleware skips this route)
+            'X-Accel-Buffering': 'no',
+        },
+    )
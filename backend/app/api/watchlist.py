@@ -1,21 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.database.session import get_db
 from app.models.watchlist import Watchlist
 from app.schemas.watchlist import WatchlistCreate, WatchlistResponse, WatchlistUpdate
+from app.schemas.stock import StockData
 from app.services.stock_service import StockService
+from app.services.analysis_service import analysis_service
+from app.api.conditional import content_etag, not_modified, not_modified_response, set_cache_headers
 from typing import List
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[WatchlistResponse])
-async def get_watchlist(db: Session = Depends(get_db)):
-    """Get all items in watchlist"""
-    items = db.query(Watchlist).all()
+async def get_watchlist(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get all items in watchlist (304 if unchanged since the client's ETag)"""
+    items = [WatchlistResponse.model_validate(item).model_dump(mode='json') for item in db.query(Watchlist).all()]
+
+    etag = content_etag(items)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+
+    set_cache_headers(response, etag)
     return items
 
 
+@router.get("/dashboard", response_model=List[StockData])
+async def get_watchlist_dashboard(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Get stock data for every watchlist item in one call.
+    Cached entries are read in bulk; only cache misses hit the upstream providers.
+    Answers If-None-Match with 304 when nothing has changed.
+    """
+    symbols = [item.symbol for item in db.query(Watchlist).all()]
+    results = await analysis_service.get_many(symbols)
+
+    etag = content_etag(results)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+
+    set_cache_headers(response, etag)
+    return results
+
+
 @router.post("", response_model=WatchlistResponse)
 async def add_to_watchlist(item: WatchlistCreate, db: Session = Depends(get_db)):
     """Add new item to watchlist"""
@@ -27,12 +54,12 @@ async def add_to_watchlist(item: WatchlistCreate, db: Session = Depends(get_db))
         raise HTTPException(status_code=400, detail=f"{item.symbol} is already in watchlist")
 
     # Validate symbol exists
-    if not StockService.validate_symbol(symbol_upper):
+    if not await StockService.validate_symbol_async(symbol_upper):
         raise HTTPException(status_code=400, detail=f"Invalid symbol: {item.symbol}")
 
     # Fetch stock info (name and sector)
     # Returns default values if rate limited or unavailable
-    stock_info = StockService.get_stock_info(symbol_upper, item.asset_type)
+    stock_info = await StockService.get_stock_info_async(symbol_upper, item.asset_type)
 
     db_item = Watchlist(
         symbol=symbol_upper,
@@ -0,0 +1,136 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app.config import get_settings
+
+settings = get_settings()
+
+# Set once price_history is a hypertable with its continuous aggregates
+_enabled = False
+
+CHUNK_INTERVAL = "90 days"
+
+AGGREGATES = {
+    'price_history_weekly': "1 week",
+    'price_history_monthly': "1 month",
+}
+
+# Bar columns shared by every aggregate; time_bucket weeks start on Monday
+AGGREGATE_SELECT = """
+    SELECT symbol,
+           time_bucket(INTERVAL '{bucket}', date) AS bucket,
+           first(open, date) AS open,
+           max(high) AS high,
+           min(low) AS low,
+           last(close, date) AS close,
+           sum(volume) AS volume
+    FROM price_history
+    GROUP BY symbol, time_bucket(INTERVAL '{bucket}', date)
+"""
+
+
+def timescale_enabled() -> bool:
+    return _enabled
+
+
+def _migrate_primary_key(conn):
+    """
+    Replace the surrogate id key with (symbol, date): bar upserts conflict on it,
+    and hypertable keys must include the time column
+    """
+    columns = [col['name'] for col in inspect(conn).get_columns('price_history')]
+    if 'id' not in columns:
+        return
+
+    print("Migrating price_history primary key to (symbol, date)...")
+    conn.execute(text("""
+        DELETE FROM price_history a USING price_history b
+        WHERE a.symbol = b.symbol AND a.date = b.date AND a.id < b.id
+    """))
+    conn.execute(text("ALTER TABLE price_history DROP CONSTRAINT IF EXISTS price_history_pkey"))
+    conn.execute(text("ALTER TABLE price_history ADD PRIMARY KEY (symbol, date)"))
+    conn.execute(text("ALTER TABLE price_history DROP COLUMN id"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_symbol_date"))
+
+
+def _create_hypertable(conn):
+    conn.execute(text(f"""
+        SELECT create_hypertable(
+            'price_history', 'date',
+            chunk_time_interval => INTERVAL '{CHUNK_INTERVAL}',
+            migrate_data => true,
+            if_not_exists => true
+        )
+    """))
+
+    compressed = conn.execute(text("""
+        SELECT compression_enabled FROM timescaledb_information.hypertables
+        WHERE hypertable_name = 'price_history'
+    """)).scalar()
+    if not compressed:
+        conn.execute(text("""
+            ALTER TABLE price_history SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = 'symbol',
+                timescaledb.compress_orderby = 'date DESC'
+            )
+        """))
+
+    # Only recent bars are ever rewritten, so older chunks can be compressed
+    conn.execute(text(f"""
+        SELECT add_compression_policy(
+            'price_history', INTERVAL '{settings.PRICE_HISTORY_COMPRESS_AFTER_DAYS} days', if_not_exists => true
+        )
+    """))
+
+
+def _create_aggregates(conn):
+    for view, bucket in AGGREGATES.items():
+        conn.execute(text(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            {AGGREGATE_SELECT.format(bucket=bucket)}
+            WITH NO DATA
+        """))
+
+        # Refresh from the start of history: only invalidated buckets (e.g. backfills) are recomputed,
+        # and real-time aggregation covers the bars newer than end_offset
+        conn.execute(text(f"""
+            SELECT add_continuous_aggregate_policy(
+                '{view}',
+                start_offset => NULL,
+                end_offset => INTERVAL '1 day',
+                schedule_interval => INTERVAL '1 hour',
+                if_not_exists => true
+            )
+        """))
+
+
+def setup_timescale(engine: Engine):
+    """
+    Turn price_history into a compressed hypertable with weekly/monthly continuous aggregates.
+    Idempotent; the (symbol, date) key migration always runs, and a plain table keyed
+    that way is left in place when the TimescaleDB extension is unavailable.
+    """
+    global _enabled
+
+    try:
+        # Hypertable and continuous aggregate DDL cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # Bar upserts conflict on (symbol, date), so plain Postgres needs the new key too
+            _migrate_primary_key(conn)
+
+            available = conn.execute(text(
+                "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+            )).scalar()
+            if not available:
+                print("TimescaleDB not available, keeping price_history as a plain table")
+                return
+
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+            _create_hypertable(conn)
+            _create_aggregates(conn)
+
+        _enabled = True
+        print("price_history hypertable and continuous aggregates ready")
+    except Exception as e:
+        print(f"Error during TimescaleDB setup: {e}")
@@ -1,16 +1,30 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.api import stocks, watchlist, screenshots, health
+from app.api import stocks, watchlist, screenshots, health, stream
 from app.tasks.scheduler import start_scheduler, stop_scheduler
 from app.database.session import engine
+from app.database.timescale import setup_timescale
 from app.models import Base
 from app.models.watchlist import Watchlist
+from app.models.screenshots import Screenshot
 from app.tasks.initialize_watchlist import initialize_sample_watchlist
+from app.tasks.ocr_worker import resume_pending_ocr, shutdown_ocr_pool
+from app.tasks.stream_refresh import start_stream_refresh, stop_stream_refresh
 from app.database.session import SessionLocal
 from app.services.stock_service import StockService
+from app.services.http_client import close_async_clients
+from app.services.cache_service import cache_service
+from app.services.stream_service import stream_broker
+from app.services.ai_service import ai_service
+from app.services.analysis_service import analysis_service
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.image_hash import content_hash, dhash, dhash_bands
 from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
+import asyncio
 import os
 from app.config import get_settings
 
@@ -31,11 +45,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    """Upstream quota exhausted: tell the client when to retry instead of returning 404"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes server-sent events through, so each event is flushed as it is sent"""
+
+    UNCOMPRESSED_PREFIXES = ("/api/stream",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.UNCOMPRESSED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON responses (polling payloads for the whole watchlist compress well)
+app.add_middleware(JSONGZipMiddleware, minimum_size=1000)
+
 # Include routers
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(watchlist.router, prefix="/api/watchlist", tags=["watchlist"])
 app.include_router(screenshots.router, prefix="/api/screenshots", tags=["screenshots"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
 
 # Ensure upload directory exists
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
@@ -76,6 +116,73 @@ def run_sector_migration(db: Session):
         db.rollback()
 
 
+def run_screenshot_migration(db: Session):
+    """Add OCR job status and deduplication hash columns; existing screenshots were processed inline"""
+    try:
+        inspector = inspect(engine)
+        columns = [col['name'] for col in inspector.get_columns('screenshots')]
+
+        if 'ocr_status' not in columns:
+            print("Adding OCR status columns to screenshots table...")
+            db.execute(text("ALTER TABLE screenshots ADD COLUMN ocr_status VARCHAR(20) NOT NULL DEFAULT 'done'"))
+            db.execute(text("ALTER TABLE screenshots ADD COLUMN ocr_error TEXT"))
+            db.commit()
+            print("OCR status columns added successfully")
+
+        if 'phash_band_keys' not in columns:
+            # Added first: the ORM queries below select every mapped column.
+            # Replaces phash_bands, whose narrow bands matched most of the table.
+            print("Adding dHash band keys to screenshots table...")
+            db.execute(text("DROP INDEX IF EXISTS ix_screenshots_phash_bands"))
+            db.execute(text("ALTER TABLE screenshots DROP COLUMN IF EXISTS phash_bands"))
+            db.execute(text("ALTER TABLE screenshots ADD COLUMN phash_band_keys INTEGER[]"))
+            db.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_screenshots_phash_band_keys ON screenshots USING gin (phash_band_keys)"
+            ))
+            db.commit()
+
+            if 'phash' in columns:
+                for screenshot in db.query(Screenshot).filter(Screenshot.phash.isnot(None)):
+                    screenshot.phash_band_keys = dhash_bands(screenshot.phash)
+                db.commit()
+
+        if 'content_hash' not in columns:
+            print("Adding deduplication hashes to screenshots table...")
+            db.execute(text("ALTER TABLE screenshots ADD COLUMN content_hash VARCHAR(64)"))
+            db.execute(text("ALTER TABLE screenshots ADD COLUMN phash BIGINT"))
+            db.execute(text(
+                "ALTER TABLE screenshots ADD COLUMN near_duplicate_of INTEGER "
+                "REFERENCES screenshots(id) ON DELETE SET NULL"
+            ))
+            db.execute(text("CREATE INDEX IF NOT EXISTS ix_screenshots_content_hash ON screenshots (content_hash)"))
+            db.execute(text("CREATE INDEX IF NOT EXISTS ix_screenshots_phash ON screenshots (phash)"))
+            db.commit()
+
+            # Backfill from the stored files so earlier uploads are matched too
+            backfilled = 0
+            for screenshot in db.query(Screenshot).filter(Screenshot.content_hash.is_(None)):
+                try:
+                    with open(screenshot.image_path, 'rb') as f:
+                        content = f.read()
+                    screenshot.content_hash = content_hash(content)
+                    screenshot.phash = dhash(content)
+                    screenshot.phash_band_keys = dhash_bands(screenshot.phash)
+                    backfilled += 1
+                except Exception as e:
+                    print(f"Could not hash screenshot {screenshot.id}: {e}")
+            db.commit()
+            print(f"Deduplication hashes added, {backfilled} screenshots backfilled")
+
+        # Supports the paginated history listing (created by create_all on new databases)
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_screenshots_upload_timestamp_id ON screenshots (upload_timestamp, id)"
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"Error during screenshot migration: {e}")
+        db.rollback()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and start scheduler on startup"""
@@ -85,13 +192,20 @@ async def startup_event():
     Base.metadata.create_all(bind=engine)
     print("Database tables created")
 
+    # Hypertable, compression and weekly/monthly aggregates for price_history
+    setup_timescale(engine)
+
     # Run sector migration
     db = SessionLocal()
     try:
         run_sector_migration(db)
+        run_screenshot_migration(db)
     finally:
         db.close()
 
+    # Pick up OCR jobs interrupted by the last shutdown
+    resume_pending_ocr()
+
     # Initialize sample watchlist
     db = SessionLocal()
     try:
@@ -99,9 +213,13 @@ async def startup_event():
     finally:
         db.close()
 
-    # Start scheduler for daily updates
+    # Start scheduler for daily updates; its refreshes run on this event loop
+    analysis_service.bind_loop(asyncio.get_running_loop())
     start_scheduler()
 
+    # Streamed symbols are refreshed server-side as they expire
+    start_stream_refresh()
+
     print("API ready at http://localhost:8000")
     print("API docs at http://localhost:8000/docs")
 
@@ -111,6 +229,12 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     print("Shutting down...")
     stop_scheduler()
+    stop_stream_refresh()
+    shutdown_ocr_pool()
+    await close_async_clients()
+    await ai_service.close()
+    await stream_broker.close()
+    cache_service.close()
 
 
 @app.get("/")
@@ -2,6 +2,8 @@ from app.database.session import Base
 from app.models.watchlist import Watchlist
 from app.models.price_history import PriceHistory
 from app.models.moving_averages import MovingAverage
+from app.models.indicator_state import IndicatorState
 from app.models.screenshots import Screenshot
+from app.models.analysis_cache import AnalysisCache, AnalysisCacheStats
 
-__all__ = ["Base", "Watchlist", "PriceHistory", "MovingAverage", "Screenshot"]
+__all__ = ["Base", "Watchlist", "PriceHistory", "MovingAverage", "IndicatorState", "Screenshot", "AnalysisCache", "AnalysisCacheStats"]
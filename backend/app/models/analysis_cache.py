@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from app.database.session import Base
+
+
+class AnalysisCache(Base):
+    """AI analysis results shared by screenshots with the same (or nearly the same) content"""
+    __tablename__ = "ai_analysis_cache"
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False, unique=True)  # SHA-256 of normalized text + tickers
+    tickers = Column(ARRAY(String), nullable=False, default=[])
+    minhash = Column(ARRAY(BigInteger), nullable=False)  # Signature for near-duplicate similarity
+    minhash_bands = Column(ARRAY(String), nullable=False)  # LSH band keys, matched with && through the GIN index
+
+    analysis = Column(Text, nullable=False)
+    recommendation = Column(String(20))
+    risk_rating = Column(String(20))
+    cost = Column(Float, nullable=False, default=0.0)  # What the original analysis cost
+
+    # Each hit is one analysis (and `cost`) not paid for again
+    exact_hits = Column(Integer, nullable=False, default=0)
+    near_hits = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_hit_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('ix_ai_analysis_cache_minhash_bands', minhash_bands, postgresql_using='gin'),
+    )
+
+
+class AnalysisCacheStats(Base):
+    """Counters of the AI analysis cache that belong to no entry (a single row)"""
+    __tablename__ = "ai_analysis_cache_stats"
+
+    id = Column(Integer, primary_key=True)
+    misses = Column(BigInteger, nullable=False, default=0)  # Lookups that found nothing and paid for an analysis
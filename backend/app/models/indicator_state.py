@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Date, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database.session import Base
+
+
+class IndicatorState(Base):
+    __tablename__ = "indicator_state"
+
+    symbol = Column(String(20), primary_key=True)
+    last_date = Column(Date, nullable=False)  # Date of the last bar folded into the state
+    state = Column(JSON, nullable=False)  # Serialized RollingIndicatorState
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,14 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy import Column, String, Float, DateTime, table, column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from app.database.session import Base
 
+# Rows per INSERT statement; 8000 rows x 7 columns stays under Postgres' 65535 bind parameter limit
+UPSERT_CHUNK_SIZE = 8000
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
 
 class PriceHistory(Base):
     __tablename__ = "price_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(20), nullable=False, index=True)
-    date = Column(DateTime(timezone=True), nullable=False)
+    # (symbol, date) is the primary key so the table can be a TimescaleDB hypertable on `date`
+    symbol = Column(String(20), primary_key=True, index=True)
+    date = Column(DateTime(timezone=True), primary_key=True)
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
@@ -16,6 +23,30 @@ class PriceHistory(Base):
     volume = Column(Float)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    __table_args__ = (
-        Index('ix_symbol_date', 'symbol', 'date'),
-    )
+
+def upsert_price_bars(db: Session, rows: list[dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    Bulk insert-or-update bars keyed by (symbol, date) with multi-row INSERT ... ON CONFLICT.
+    A full-history backfill of one symbol is a single statement. Does not commit.
+    """
+    for start in range(0, len(rows), chunk_size):
+        stmt = insert(PriceHistory).values(rows[start:start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PriceHistory.symbol, PriceHistory.date],
+            set_={name: stmt.excluded[name] for name in BAR_COLUMNS},
+        )
+        db.execute(stmt)
+
+    return len(rows)
+
+
+# Continuous aggregates over price_history (created by app.database.timescale)
+price_history_weekly = table(
+    "price_history_weekly",
+    column("symbol"), column("bucket"), column("open"), column("high"), column("low"), column("close"), column("volume"),
+)
+
+price_history_monthly = table(
+    "price_history_monthly",
+    column("symbol"), column("bucket"), column("open"), column("high"), column("low"), column("close"), column("volume"),
+)
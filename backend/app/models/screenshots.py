@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, Float, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from app.database.session import Base
 
@@ -10,6 +11,16 @@ class Screenshot(Base):
     image_path = Column(String(255), nullable=False)
     upload_timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Deduplication: SHA-256 of the file for exact copies, dHash for recompressed/cropped ones
+    content_hash = Column(String(64), index=True)
+    phash = Column(BigInteger, index=True)
+    phash_band_keys = Column(ARRAY(Integer))  # image_hash.dhash_bands, narrows the near-duplicate search
+    near_duplicate_of = Column(Integer, ForeignKey('screenshots.id', ondelete='SET NULL'))
+
+    # OCR job state: 'pending', 'processing', 'done' or 'failed'
+    ocr_status = Column(String(20), nullable=False, server_default='done')
+    ocr_error = Column(Text)
+
     # OCR extracted (free)
     extracted_text = Column(Text)
     tickers_mentioned = Column(ARRAY(String), default=[])
@@ -22,3 +33,9 @@ class Screenshot(Base):
     risk_rating = Column(String(20))  # 'LOW', 'MEDIUM', 'HIGH'
     analysis_cost = Column(Float)  # Track costs
     analyzed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # History is listed newest first with keyset pagination on (upload_timestamp, id)
+        Index('ix_screenshots_upload_timestamp_id', upload_timestamp, id),
+        Index('ix_screenshots_phash_band_keys', phash_band_keys, postgresql_using='gin'),
+    )
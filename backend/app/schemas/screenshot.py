@@ -3,12 +3,16 @@ from typing import Optional
 from datetime import datetime
 
 
-class ScreenshotUploadResponse(BaseModel):
+class OCRStatusResponse(BaseModel):
     id: int
-    extracted_text: str
-    tickers_mentioned: list[str]
-    investment_thesis: str
-    upload_timestamp: datetime
+    ocr_status: str
+    ocr_error: Optional[str] = None
+    extracted_text: Optional[str] = None
+    tickers_mentioned: list[str] = []
+    investment_thesis: Optional[str] = None
+
+    class Config:
+        from_attributes = True
 
 
 class AIAnalysisResponse(BaseModel):
@@ -18,12 +22,63 @@ class AIAnalysisResponse(BaseModel):
     risk_rating: str
     analysis_cost: float
     analyzed_at: datetime
+    cached: bool = False  # Served from the AI result cache at no cost
+
+
+class ScreenshotSummary(BaseModel):
+    """History list entry: everything but the extracted text and the full AI analysis"""
+    id: int
+    image_path: str
+    upload_timestamp: datetime
+    near_duplicate_of: Optional[int] = None
+    ocr_status: str = 'done'
+    ocr_error: Optional[str] = None
+    tickers_mentioned: list[str] = []
+    investment_thesis: Optional[str] = None
+    ai_analyzed: bool = False
+    recommendation: Optional[str] = None
+    risk_rating: Optional[str] = None
+    analysis_cost: Optional[float] = None
+    analyzed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScreenshotPage(BaseModel):
+    items: list[ScreenshotSummary]
+    next_cursor: Optional[str] = None
+
+
+class BulkAnalysisRequest(BaseModel):
+    ids: Optional[list[int]] = None  # None analyzes every screenshot still missing an analysis
+
+
+class BulkAnalysisItem(BaseModel):
+    id: int
+    status: str  # 'analyzed', 'failed' or 'skipped'
+    recommendation: Optional[str] = None
+    risk_rating: Optional[str] = None
+    analysis_cost: Optional[float] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class BulkAnalysisResponse(BaseModel):
+    results: list[BulkAnalysisItem]
+    analyzed: int
+    failed: int
+    skipped: int
+    total_cost: float
 
 
 class ScreenshotResponse(BaseModel):
     id: int
     image_path: str
     upload_timestamp: datetime
+    ocr_status: str = 'done'
+    near_duplicate_of: Optional[int] = None
+    ocr_error: Optional[str] = None
     extracted_text: Optional[str] = None
     tickers_mentioned: list[str] = []
     investment_thesis: Optional[str] = None
@@ -36,3 +91,21 @@ class ScreenshotResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ScreenshotUploadResponse(BaseModel):
+    id: int
+    ocr_status: str
+    upload_timestamp: datetime
+    duplicate: bool = False  # Identical file already uploaded; `id` is the existing screenshot
+    near_duplicate_of: Optional[int] = None  # Visually similar earlier screenshot
+    screenshot: Optional[ScreenshotResponse] = None  # For a duplicate, the existing OCR/AI results
+
+
+class AnalysisCacheStats(BaseModel):
+    entries: int
+    hits: int
+    exact_hits: int
+    near_hits: int
+    misses: int
+    saved_cost: float
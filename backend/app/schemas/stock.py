@@ -18,6 +18,14 @@ class HighLowRange(BaseModel):
     position_percent: Optional[float] = None  # Position in 52-week range (0-100)
 
 
+class PriceRange(BaseModel):
+    weeks: int
+    high: Optional[float] = None
+    low: Optional[float] = None
+    current_price: float
+    position_percent: Optional[float] = None  # Position in the range (0-100)
+
+
 class StockData(BaseModel):
     symbol: str
     name: str
@@ -26,9 +34,16 @@ class StockData(BaseModel):
     change_24h_percent: Optional[float] = None
     moving_averages: MovingAveragesData
     high_low_range: HighLowRange
+    price_ranges: list[PriceRange] = []  # 13/26/52/104-week ranges
     last_updated: datetime
 
 
+class StockRanges(BaseModel):
+    symbol: str
+    current_price: float
+    price_ranges: list[PriceRange]
+
+
 class PricePoint(BaseModel):
     date: datetime
     price: float
@@ -1,5 +1,5 @@
-from anthropic import Anthropic
-import os
+from anthropic import AsyncAnthropic
+import asyncio
 from typing import Optional, Dict
 from app.config import get_settings
 
@@ -7,15 +7,30 @@ settings = get_settings()
 
 
 class AIAnalysisService:
-    def __init__(self):
-        self.api_key = settings.ANTHROPIC_API_KEY
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.api_key = settings.ANTHROPIC_API_KEY if api_key is None else api_key
         self.enabled = bool(self.api_key and self.api_key.strip())
 
+        # Caps in-flight requests across single and bulk analyses
+        self.semaphore = asyncio.Semaphore(concurrency or settings.AI_CONCURRENCY)
+
         if self.enabled:
-            self.client = Anthropic(api_key=self.api_key)
+            self.client = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=base_url or settings.ANTHROPIC_BASE_URL or None,
+            )
         else:
             self.client = None
 
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+
     async def deep_analysis(self, extracted_text: str, tickers: list[str]) -> Optional[Dict]:
         """
         Optional deep analysis - only called when user clicks "Analyze" button
@@ -47,11 +62,12 @@ Provide a structured analysis with:
 Be concise (max 300 words). Focus on fundamentals, not hype.
 """
 
-            response = self.client.messages.create(
-                model="claude-3-5-haiku-20241022",  # Cheaper model
-                max_tokens=500,  # Limit tokens = lower cost
-                messages=[{"role": "user", "content": prompt}]
-            )
+            async with self.semaphore:
+                response = await self.client.messages.create(
+                    model="claude-3-5-haiku-20241022",  # Cheaper model
+                    max_tokens=500,  # Limit tokens = lower cost
+                    messages=[{"role": "user", "content": prompt}]
+                )
 
             analysis_text = response.content[0].text
 
@@ -1,8 +1,22 @@
 import requests
+import httpx
 import os
+import re
 from typing import Optional
-from datetime import datetime
-import statistics
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from app.services.http_client import get_sync_session, get_async_client
+from app.services.rate_limiter import alphavantage_limiter, RateLimitExceeded
+from app.config import get_settings
+
+settings = get_settings()
+
+# "Our standard API call frequency is 5 calls per minute", "... our standard API rate limit is 25 requests
+# per day"; other notices (e.g. premium-only endpoints) come in the same fields but are not quota related
+RATE_LIMIT_PATTERN = re.compile(r'rate limit|call frequency|(?:calls|requests) per', re.IGNORECASE)
+# The burst notice quotes both limits, so the daily one is the notice without a per-minute rate
+BURST_LIMIT_PATTERN = re.compile(r'per minute|call frequency', re.IGNORECASE)
+DAILY_LIMIT_PATTERN = re.compile(r'per day|daily', re.IGNORECASE)
 
 
 class AlphaVantageService:
@@ -11,50 +25,88 @@ class AlphaVantageService:
     BASE_URL = "https://www.alphavantage.co/query"
     API_KEY = os.getenv('ALPHAVANTAGE_API_KEY', 'demo')  # 'demo' for testing
 
+    @staticmethod
+    def _check_limit(data: dict) -> dict:
+        """Alpha Vantage reports quota exhaustion in the body of a 200 response"""
+        message = data.get('Note') or data.get('Information')
+        if message and not RATE_LIMIT_PATTERN.search(message):
+            # Not a quota notice; the parsers find no data and the call fails for this symbol only
+            print(f"Alpha Vantage notice: {message}")
+        elif message:
+            # A used-up daily quota stays used up until it resets; retrying every minute only burns calls
+            daily = DAILY_LIMIT_PATTERN.search(message) and not BURST_LIMIT_PATTERN.search(message)
+            pause = AlphaVantageService._until_quota_reset() if daily else 60
+            print(f"Alpha Vantage API limit reached, pausing {pause:.0f}s: {message}")
+            alphavantage_limiter.exhaust(pause)
+            raise RateLimitExceeded(alphavantage_limiter.name, pause)
+        return data
+
+    @staticmethod
+    def _until_quota_reset() -> float:
+        """Seconds until the daily quota resets (midnight in ALPHAVANTAGE_QUOTA_RESET_TZ)"""
+        now = datetime.now(ZoneInfo(settings.ALPHAVANTAGE_QUOTA_RESET_TZ))
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+        return (midnight - now).total_seconds()
+
+    @staticmethod
+    def _request(params: dict) -> dict:
+        """Blocking GET against the Alpha Vantage query endpoint"""
+        alphavantage_limiter.acquire()
+        params = {**params, 'apikey': AlphaVantageService.API_KEY}
+        response = get_sync_session().get(AlphaVantageService.BASE_URL, params=params, timeout=settings.HTTP_TIMEOUT)
+        response.raise_for_status()
+        return AlphaVantageService._check_limit(response.json())
+
+    @staticmethod
+    async def _request_async(params: dict) -> dict:
+        """Non-blocking GET against the Alpha Vantage query endpoint"""
+        await alphavantage_limiter.acquire_async()
+        params = {**params, 'apikey': AlphaVantageService.API_KEY}
+        client = get_async_client(AlphaVantageService.BASE_URL)
+        response = await client.get(AlphaVantageService.BASE_URL, params=params)
+        response.raise_for_status()
+        return AlphaVantageService._check_limit(response.json())
+
+    @staticmethod
+    def _quote_params(symbol: str) -> dict:
+        # Use GLOBAL_QUOTE endpoint for current price
+        return {'function': 'GLOBAL_QUOTE', 'symbol': symbol}
+
+    @staticmethod
+    def _parse_quote(symbol: str, data: dict) -> Optional[dict]:
+        """Extract current price and daily change from a GLOBAL_QUOTE response"""
+        # API limits are raised by _request; only symbol errors reach here
+        if 'Error Message' in data:
+            print(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
+            return None
+
+        quote = data.get('Global Quote', {})
+        if not quote:
+            return None
+
+        current_price = float(quote.get('05. price', 0))
+        change = float(quote.get('09. change', 0))
+        change_percent = float(quote.get('10. change percent', '0').replace('%', ''))
+
+        if not current_price:
+            return None
+
+        return {
+            'symbol': symbol,
+            'name': symbol,  # Alpha Vantage doesn't provide name in GLOBAL_QUOTE
+            'current_price': current_price,
+            'change_24h': change,
+            'change_24h_percent': change_percent,
+        }
+
     @staticmethod
     def get_current_price(symbol: str) -> Optional[dict]:
         """Get current stock price and daily change from Alpha Vantage"""
         try:
-            # Use GLOBAL_QUOTE endpoint for current price
-            params = {
-                'function': 'GLOBAL_QUOTE',
-                'symbol': symbol,
-                'apikey': AlphaVantageService.API_KEY
-            }
-
-            response = requests.get(AlphaVantageService.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # Check for API limit or error
-            if 'Note' in data:
-                print(f"Alpha Vantage API limit reached: {data['Note']}")
-                return None
-
-            if 'Error Message' in data:
-                print(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
-                return None
-
-            quote = data.get('Global Quote', {})
-            if not quote:
-                return None
-
-            current_price = float(quote.get('05. price', 0))
-            previous_close = float(quote.get('08. previous close', 0))
-            change = float(quote.get('09. change', 0))
-            change_percent = float(quote.get('10. change percent', '0').replace('%', ''))
-
-            if not current_price:
-                return None
-
-            return {
-                'symbol': symbol,
-                'name': symbol,  # Alpha Vantage doesn't provide name in GLOBAL_QUOTE
-                'current_price': current_price,
-                'change_24h': change,
-                'change_24h_percent': change_percent,
-            }
-
+            data = AlphaVantageService._request(AlphaVantageService._quote_params(symbol))
+            return AlphaVantageService._parse_quote(symbol, data)
+        except RateLimitExceeded:
+            raise
         except requests.exceptions.RequestException as e:
             print(f"Error fetching Alpha Vantage data for {symbol}: {e}")
             return None
@@ -63,142 +115,104 @@ class AlphaVantageService:
             return None
 
     @staticmethod
-    def get_historical_data(symbol: str, outputsize: str = 'full') -> Optional[list]:
-        """Get daily historical data from Alpha Vantage"""
+    async def get_current_price_async(symbol: str) -> Optional[dict]:
+        """Non-blocking variant of get_current_price"""
         try:
-            params = {
-                'function': 'TIME_SERIES_DAILY',
-                'symbol': symbol,
-                'outputsize': outputsize,  # 'compact' = 100 days, 'full' = 20+ years
-                'apikey': AlphaVantageService.API_KEY
-            }
-
-            response = requests.get(AlphaVantageService.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # Check for API limit or error
-            if 'Note' in data:
-                print(f"Alpha Vantage API limit reached: {data['Note']}")
-                return None
-
-            if 'Error Message' in data:
-                print(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
-                return None
-
-            time_series = data.get('Time Series (Daily)', {})
-            if not time_series:
-                return None
-
-            # Convert to list of dicts sorted by date
-            prices = []
-            for date_str, values in sorted(time_series.items()):
-                prices.append({
-                    'date': date_str,
-                    'close': float(values.get('4. close', 0)),
-                    'high': float(values.get('2. high', 0)),
-                    'low': float(values.get('3. low', 0)),
-                })
-
-            return prices
-
+            data = await AlphaVantageService._request_async(AlphaVantageService._quote_params(symbol))
+            return AlphaVantageService._parse_quote(symbol, data)
+        except RateLimitExceeded:
+            raise
+        except httpx.HTTPError as e:
+            print(f"Error fetching Alpha Vantage data for {symbol}: {e}")
+            return None
         except Exception as e:
-            print(f"Error fetching historical data for {symbol}: {e}")
+            print(f"Unexpected error fetching Alpha Vantage data for {symbol}: {e}")
             return None
 
     @staticmethod
-    def calculate_moving_averages(prices: list, current_price: float) -> dict:
-        """Calculate moving averages from historical price data"""
-        if not prices or len(prices) < 50:
-            return {
-                'ma_50': None,
-                'ma_100': None,
-                'ma_150': None,
-                'ma_200_day': None,
-                'ma_200_week': None,
-            }
+    def _history_params(symbol: str, outputsize: str) -> dict:
+        return {
+            'function': 'TIME_SERIES_DAILY',
+            'symbol': symbol,
+            'outputsize': outputsize,  # 'compact' = 100 days, 'full' = 20+ years
+        }
 
-        # Extract just the closing price values (most recent last)
-        close_prices = [p['close'] for p in prices]
+    @staticmethod
+    def _parse_time_series(symbol: str, data: dict) -> Optional[list]:
+        """Convert a TIME_SERIES_DAILY response into bars sorted by date"""
+        # API limits are raised by _request; only symbol errors reach here
+        if 'Error Message' in data:
+            print(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
+            return None
 
-        def calc_ma(days):
-            if len(close_prices) >= days:
-                return statistics.mean(close_prices[-days:])
+        time_series = data.get('Time Series (Daily)', {})
+        if not time_series:
             return None
 
-        # Calculate moving averages
-        ma_50 = calc_ma(50)
-        ma_100 = calc_ma(100)
-        ma_150 = calc_ma(150)
-        ma_200_day = calc_ma(200)
+        # Convert to list of dicts sorted by date
+        prices = []
+        for date_str, values in sorted(time_series.items()):
+            prices.append({
+                'date': date_str,
+                'open': float(values.get('1. open', 0)),
+                'high': float(values.get('2. high', 0)),
+                'low': float(values.get('3. low', 0)),
+                'close': float(values.get('4. close', 0)),
+                'volume': float(values.get('5. volume', 0)),
+            })
 
-        # 200-week MA = 200 weeks * 5 trading days = 1000 days
-        ma_200_week = calc_ma(min(1000, len(close_prices)))
+        return prices
 
-        return {
-            'ma_50': ma_50,
-            'ma_100': ma_100,
-            'ma_150': ma_150,
-            'ma_200_day': ma_200_day,
-            'ma_200_week': ma_200_week,
-        }
+    @staticmethod
+    def get_historical_data(symbol: str, outputsize: str = 'full') -> Optional[list]:
+        """Get daily historical data from Alpha Vantage"""
+        try:
+            data = AlphaVantageService._request(AlphaVantageService._history_params(symbol, outputsize))
+            return AlphaVantageService._parse_time_series(symbol, data)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching historical data for {symbol}: {e}")
+            return None
+
+    @staticmethod
+    async def get_historical_data_async(symbol: str, outputsize: str = 'full') -> Optional[list]:
+        """Non-blocking variant of get_historical_data"""
+        try:
+            data = await AlphaVantageService._request_async(AlphaVantageService._history_params(symbol, outputsize))
+            return AlphaVantageService._parse_time_series(symbol, data)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching historical data for {symbol}: {e}")
+            return None
 
     @staticmethod
-    def calculate_52week_range(prices: list, current_price: float) -> dict:
-        """Calculate 52-week high/low from historical data"""
-        # 52 weeks * 5 trading days = 260 trading days
-        if not prices or len(prices) < 260:
-            return {
-                'week_52_high': None,
-                'week_52_low': None,
-                'current_price': current_price,
-                'position_percent': None,
-            }
-
-        # Get last 260 trading days
-        recent_prices = prices[-260:]
-        highs = [p['high'] for p in recent_prices]
-        lows = [p['low'] for p in recent_prices]
-
-        week_52_high = max(highs)
-        week_52_low = min(lows)
-
-        # Calculate position percentage
-        price_range = week_52_high - week_52_low
-        if price_range > 0:
-            position_percent = ((current_price - week_52_low) / price_range) * 100
-        else:
-            position_percent = 50.0
+    def _parse_overview(symbol: str, data: dict) -> dict:
+        if 'Error Message' in data:
+            return {'name': symbol, 'sector': 'Unknown'}
 
         return {
-            'week_52_high': week_52_high,
-            'week_52_low': week_52_low,
-            'current_price': current_price,
-            'position_percent': position_percent,
+            'name': data.get('Name', symbol),
+            'sector': data.get('Sector', 'Unknown')
         }
 
     @staticmethod
     def get_company_overview(symbol: str) -> dict:
         """Get company name and sector from Alpha Vantage"""
         try:
-            params = {
-                'function': 'OVERVIEW',
-                'symbol': symbol,
-                'apikey': AlphaVantageService.API_KEY
-            }
-
-            response = requests.get(AlphaVantageService.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'Note' in data or 'Error Message' in data:
-                return {'name': symbol, 'sector': 'Unknown'}
-
-            return {
-                'name': data.get('Name', symbol),
-                'sector': data.get('Sector', 'Unknown')
-            }
+            data = AlphaVantageService._request({'function': 'OVERVIEW', 'symbol': symbol})
+            return AlphaVantageService._parse_overview(symbol, data)
+        except Exception as e:
+            print(f"Error fetching company overview for {symbol}: {e}")
+            return {'name': symbol, 'sector': 'Unknown'}
 
+    @staticmethod
+    async def get_company_overview_async(symbol: str) -> dict:
+        """Non-blocking variant of get_company_overview"""
+        try:
+            data = await AlphaVantageService._request_async({'function': 'OVERVIEW', 'symbol': symbol})
+            return AlphaVantageService._parse_overview(symbol, data)
         except Exception as e:
             print(f"Error fetching company overview for {symbol}: {e}")
             return {'name': symbol, 'sector': 'Unknown'}
@@ -209,3 +223,9 @@ class AlphaVantageService:
         # Try to get quote - if it returns data, symbol is valid
         data = AlphaVantageService.get_current_price(symbol)
         return data is not None
+
+    @staticmethod
+    async def validate_symbol_async(symbol: str) -> bool:
+        """Non-blocking variant of validate_symbol"""
+        data = await AlphaVantageService.get_current_price_async(symbol)
+        return data is not None
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import re
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.database.session import SessionLocal
+from app.models.analysis_cache import AnalysisCache, AnalysisCacheStats
+from app.services.ai_service import ai_service
+from app.config import get_settings
+
+settings = get_settings()
+
+# MinHash over character 5-shingles, so one misread letter only changes a few
+# shingles; 8 bands of 8 rows put the LSH candidate threshold near 0.77 Jaccard,
+# just under the default AI_CACHE_SIMILARITY
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+
+_rng = np.random.default_rng(20240117)
+_MASKS = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+_URL = re.compile(r'https?://\S+|www\.\S+')
+# Text that differs between captures of the same post: clock times (12:41 pm), dates (3/4/24,
+# 2024-01-17, jan 17), engagement counts and post ages (1.2k, 15k, 5h, 2d). Prices, targets and
+# percentages are what a post says, so they stay ($1.5m is a price, not a count).
+_VOLATILE = re.compile(
+    r'\b\d{1,2}:\d{2}(?::\d{2})?(?:\s*[ap]m)?\b'
+    r'|\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b'
+    r'|\b(?:jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?\b'
+    r'|(?<![$\d.,])\b\d+(?:[.,]\d+)?[kmbhdsw]\b'
+)
+_NON_WORD = re.compile(r'[^a-z0-9$@#]+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercased words of a post without links, numbers and punctuation"""
+    text = _URL.sub(' ', (text or '').lower())
+    text = _VOLATILE.sub(' ', text)
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def fingerprint(normalized: str, tickers: list[str]) -> str:
+    key = normalized + '|' + ','.join(sorted(t.upper() for t in tickers))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def minhash_signature(normalized: str) -> np.ndarray:
+    if len(normalized) > SHINGLE:
+        shingles = {normalized[i:i + SHINGLE] for i in range(len(normalized) - SHINGLE + 1)}
+    else:
+        shingles = {normalized}
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), 'big') for sh in shingles],
+        dtype=np.uint64,
+    )
+    # One hash function per permutation: xor with its mask, then multiply-xorshift mix (wraps mod 2^64)
+    with np.errstate(over='ignore'):
+        mixed = (hashes[:, None] ^ _MASKS) * _MIX
+    mixed ^= mixed >> np.uint64(32)
+    # Stored in a BIGINT[] column, so keep the bits as signed values
+    return mixed.min(axis=0).view(np.int64)
+
+
+def band_keys(signature: np.ndarray) -> list[str]:
+    """One key per LSH band; texts sharing any key are near-duplicate candidates"""
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(np.asarray(a, dtype=np.int64) == np.asarray(b, dtype=np.int64)))
+
+
+class AnalysisCacheService:
+    """
+    Reuses AI analyses across screenshots of the same content.
+    Exact matches are found by fingerprint; re-captures with different OCR noise
+    by MinHash band overlap (GIN index) followed by a similarity check.
+    """
+
+    def __init__(self):
+        # Single-flight: identical content analyzed concurrently is paid for once
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def lookup(db: Session, normalized: str, tickers: list[str], record_miss: bool = False) -> Optional[AnalysisCache]:
+        """
+        Cached analysis for this content, recording the hit.
+        With `record_miss`, finding nothing is counted as a miss (the caller pays for an analysis).
+        """
+        digest = fingerprint(normalized, tickers)
+        entry = db.query(AnalysisCache).filter(AnalysisCache.fingerprint == digest).first()
+        counter = AnalysisCache.exact_hits
+        if entry is None:
+            entry = AnalysisCacheService._nearest(db, normalized, tickers)
+            counter = AnalysisCache.near_hits
+        if entry is None:
+            if record_miss:
+                AnalysisCacheService._count_miss(db)
+                db.commit()
+            return None
+
+        # Incremented in SQL so concurrent hits on one entry are all counted
+        db.query(AnalysisCache).filter(AnalysisCache.id == entry.id).update(
+            {counter: counter + 1, AnalysisCache.last_hit_at: datetime.now()},
+            synchronize_session=False,
+        )
+        db.commit()
+        return entry
+
+    @staticmethod
+    def _count_miss(db: Session):
+        stmt = insert(AnalysisCacheStats).values(id=1, misses=1)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[AnalysisCacheStats.id],
+            set_={'misses': AnalysisCacheStats.misses + 1},
+        ))
+
+    @staticmethod
+    def _nearest(db: Session, normalized: str, tickers: list[str]) -> Optional[AnalysisCache]:
+        signature = minhash_signature(normalized)
+        candidates = (
+            db.query(AnalysisCache)
+            .filter(AnalysisCache.minhash_bands.overlap(band_keys(signature)))
+            .limit(50)
+            .all()
+        )
+
+        # A different ticker set is a different question, however similar the text
+        wanted = sorted(t.upper() for t in tickers)
+        best, best_score = None, settings.AI_CACHE_SIMILARITY
+        for entry in candidates:
+            if sorted(entry.tickers or []) != wanted:
+                continue
+            score = similarity(signature, entry.minhash)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    @staticmethod
+    def store(db: Session, normalized: str, tickers: list[str], result: dict):
+        signature = minhash_signature(normalized)
+        db.add(AnalysisCache(
+            fingerprint=fingerprint(normalized, tickers),
+            tickers=sorted(t.upper() for t in tickers),
+            minhash=[int(v) for v in signature],
+            minhash_bands=band_keys(signature),
+            analysis=result['analysis'],
+            recommendation=result['recommendation'],
+            risk_rating=result['risk_rating'],
+            cost=result['cost'],
+        ))
+        try:
+            db.commit()
+        except Exception:
+            # Another worker stored the same fingerprint first
+            db.rollback()
+
+    @staticmethod
+    def stats(db: Session) -> dict:
+        exact, near, entries, saved = db.query(
+            func.coalesce(func.sum(AnalysisCache.exact_hits), 0),
+            func.coalesce(func.sum(AnalysisCache.near_hits), 0),
+            func.count(AnalysisCache.id),
+            func.coalesce(func.sum((AnalysisCache.exact_hits + AnalysisCache.near_hits) * AnalysisCache.cost), 0.0),
+        ).one()
+        # Includes misses whose analysis failed or lost the race to store its entry
+        misses = db.query(AnalysisCacheStats.misses).filter(AnalysisCacheStats.id == 1).scalar() or 0
+        return {
+            'entries': entries,
+            'hits': exact + near,
+            'exact_hits': exact,
+            'near_hits': near,
+            'misses': misses,
+            'saved_cost': round(float(saved), 4),
+        }
+
+    def _lookup_sync(self, normalized: str, tickers: list[str], record_miss: bool = False) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            entry = self.lookup(db, normalized, tickers, record_miss)
+            if entry is None:
+                return None
+            return {
+                'analysis': entry.analysis,
+                'recommendation': entry.recommendation,
+                'risk_rating': entry.risk_rating,
+                'cost': 0.0,
+                'cached': True,
+            }
+        finally:
+            db.close()
+
+    def _store_sync(self, normalized: str, tickers: list[str], result: dict):
+        db = SessionLocal()
+        try:
+            self.store(db, normalized, tickers, result)
+        finally:
+            db.close()
+
+    async def _analyze(self, normalized: str, extracted_text: str, tickers: list[str]) -> dict:
+        cached = await asyncio.to_thread(self._lookup_sync, normalized, tickers, True)
+        if cached:
+            return cached
+
+        result = await ai_service.deep_analysis(extracted_text, tickers)
+        if 'error' not in result:
+            await asyncio.to_thread(self._store_sync, normalized, tickers, result)
+        return result
+
+    async def analyze(self, extracted_text: str, tickers: list[str]) -> dict:
+        """deep_analysis result for this content, from the cache (at zero cost) when possible"""
+        normalized = normalize_text(extracted_text)
+        digest = fingerprint(normalized, tickers)
+
+        task = self._inflight.get(digest)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze(normalized, extracted_text, tickers))
+            self._inflight[digest] = task
+            task.add_done_callback(lambda _: self._inflight.pop(digest, None))
+            return await asyncio.shield(task)
+
+        # Joined an analysis already in flight for the same content; read it back so the hit is counted
+        result = await asyncio.shield(task)
+        if 'error' in result:
+            return result
+        cached = await asyncio.to_thread(self._lookup_sync, normalized, tickers)
+        return cached or {**result, 'cost': 0.0, 'cached': True}
+
+
+# Global cache instance
+analysis_cache = AnalysisCacheService()
@@ -0,0 +1,296 @@
+import asyncio
+import time
+from typing import Optional
+from datetime import datetime
+from app.services.stock_service import StockService
+from app.services.crypto_service import CryptoService
+from app.services.price_history_service import PriceHistoryService
+from app.services.rolling_state import IndicatorStateService
+from app.services.cache_service import cache_service
+from app.services.stream_service import stream_broker
+from app.services.rate_limiter import RateLimitExceeded, background_priority
+from app.database.session import SessionLocal
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def empty_moving_averages() -> dict:
+    """Moving averages placeholder used when history is unavailable"""
+    return {
+        'ma_50': None,
+        'ma_100': None,
+        'ma_150': None,
+        'ma_200_day': None,
+        'ma_200_week': None,
+    }
+
+
+def empty_high_low_range(current_price: float) -> dict:
+    """52-week range placeholder used when history is unavailable"""
+    return {
+        'week_52_high': None,
+        'week_52_low': None,
+        'current_price': current_price,
+        'position_percent': None,
+    }
+
+
+class StockAnalysisService:
+    """Builds the cached price + indicator payload served as StockData"""
+
+    def __init__(self):
+        # symbol -> task computing it, shared by concurrent cache misses
+        self._inflight: dict[str, asyncio.Future] = {}
+        # symbol -> background revalidation; kept apart so interactive misses never queue behind one
+        self._revalidating: dict[str, asyncio.Future] = {}
+        # The API event loop; scheduler threads submit their refreshes to it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Bounds background revalidations, however many stale entries a page load hits
+        self._revalidations = asyncio.Semaphore(settings.REVALIDATE_CONCURRENCY)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def _compute_indicators(self, db, symbol: str, new_bars: list[dict], current_price: float) -> Optional[dict]:
+        """
+        Advance the rolling indicator state with the newly stored bars.
+        Returns None when no history is stored for the symbol.
+        """
+        try:
+            state = IndicatorStateService.advance(db, symbol, new_bars)
+        except Exception as e:
+            # The new bars are stored but the state may not have caught up; drop it so
+            # the next refresh rebuilds, and serve this one from a fresh rebuild
+            print(f"Error advancing indicator state for {symbol}: {e}")
+            db.rollback()
+            IndicatorStateService.invalidate(db, symbol)
+            state = IndicatorStateService.rebuild(db, symbol)
+        if state is None:
+            return None
+
+        return {
+            'moving_averages': state.moving_averages(),
+            'high_low_range': state.high_low_range(current_price),
+            'price_ranges': state.price_ranges(current_price),
+        }
+
+    def _assemble(self, symbol: str, current_data: dict, indicators: Optional[dict]) -> dict:
+        """Build the StockData payload"""
+        current_price = current_data['current_price']
+
+        if indicators:
+            moving_averages = indicators['moving_averages']
+            high_low_range = indicators['high_low_range']
+            price_ranges = indicators['price_ranges']
+        else:
+            moving_averages = empty_moving_averages()
+            high_low_range = empty_high_low_range(current_price)
+            price_ranges = []
+
+        return {
+            'symbol': symbol,
+            'name': current_data['name'],
+            'current_price': current_price,
+            'change_24h': current_data['change_24h'],
+            'change_24h_percent': current_data['change_24h_percent'],
+            'moving_averages': moving_averages,
+            'high_low_range': high_low_range,
+            'price_ranges': price_ranges,
+            'last_updated': datetime.now().isoformat(),
+        }
+
+    async def build_analysis_async(
+        self, symbol: str, current_data: Optional[dict] = None
+    ) -> tuple[Optional[dict], Optional[int]]:
+        """
+        Fetch the current price, sync stored history and compute indicators.
+        `current_data` may carry a quote fetched in bulk beforehand.
+        Returns (payload, fresh TTL override); the payload is None if the symbol has no current price.
+        """
+        if current_data is None:
+            current_data = await StockService.get_current_price_async(symbol)
+        if not current_data:
+            return None, None
+
+        db = SessionLocal()
+        try:
+            try:
+                new_bars = await PriceHistoryService.sync_history_async(db, symbol, StockService.is_crypto(symbol))
+            except RateLimitExceeded as e:
+                # No stored history and none fetchable yet: serve the quote already paid for
+                # and retry the history soon instead of failing the whole stock
+                print(f"Serving {symbol} without indicators: {e}")
+                return self._assemble(symbol, current_data, None), settings.CACHE_TTL_PRICE_ONLY
+
+            indicators = await asyncio.to_thread(
+                self._compute_indicators, db, symbol, new_bars, current_data['current_price']
+            )
+        finally:
+            db.close()
+
+        return self._assemble(symbol, current_data, indicators), None
+
+    async def _compute_and_cache(self, symbol: str, current_data: Optional[dict] = None) -> Optional[dict]:
+        """
+        Build and cache analysis under a Redis lease so only one worker computes a key.
+        Workers that lose the race wait for the winner's result instead of fetching.
+        """
+        lock_name = f"stock_analysis:{symbol}"
+        token = cache_service.acquire_lock(lock_name, ttl=settings.ANALYSIS_LOCK_TTL)
+
+        if token is None:
+            deadline = time.monotonic() + settings.ANALYSIS_LOCK_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+                entry = cache_service.get_stock_analysis_entry(symbol)
+                if entry and cache_service.is_fresh(entry):
+                    return entry['data']
+            # The lease holder is slow or gone; compute it ourselves
+
+        # Background work may queue on the rate limiter for longer than the lease lasts
+        keeper = asyncio.ensure_future(self._keep_lease(lock_name, token)) if token else None
+        try:
+            response_data, fresh_ttl = await self.build_analysis_async(symbol, current_data)
+            if response_data:
+                cache_service.set_stock_analysis(symbol, response_data, fresh_ttl)
+                stream_broker.publish(symbol, response_data)
+            return response_data
+        finally:
+            if token:
+                keeper.cancel()
+                cache_service.release_lock(lock_name, token)
+
+    @staticmethod
+    async def _keep_lease(lock_name: str, token: str):
+        """Renew a recompute lease until cancelled, well before it expires"""
+        while True:
+            await asyncio.sleep(settings.ANALYSIS_LOCK_TTL / 3)
+            if not cache_service.extend_lock(lock_name, token, settings.ANALYSIS_LOCK_TTL):
+                return
+
+    async def _compute_limited(self, symbol: str) -> Optional[dict]:
+        async with self._revalidations:
+            # An interactive miss may have refreshed the entry while this one queued for a slot
+            entry = cache_service.get_stock_analysis_entry(symbol)
+            if entry and cache_service.is_fresh(entry):
+                return entry['data']
+            return await self._compute_and_cache(symbol)
+
+    def _shared_task(self, symbol: str, current_data: Optional[dict] = None) -> asyncio.Future:
+        """Single-flight: concurrent misses for the same symbol share one computation"""
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_cache(symbol, current_data))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        return task
+
+    async def _compute_shared(self, symbol: str, current_data: Optional[dict] = None) -> Optional[dict]:
+        # Shielded so one cancelled request does not cancel the shared work
+        return await asyncio.shield(self._shared_task(symbol, current_data))
+
+    def _revalidate(self, symbol: str):
+        """
+        Recompute an expired entry in the background while callers get the stale one.
+        Waits for a REVALIDATE_CONCURRENCY slot; a miss for the same symbol meanwhile
+        computes it at interactive priority rather than joining this task.
+        """
+        if symbol in self._inflight or symbol in self._revalidating:
+            return
+
+        # The task copies the current context, so its upstream calls queue as background work
+        with background_priority():
+            task = asyncio.ensure_future(self._compute_limited(symbol))
+        self._revalidating[symbol] = task
+        task.add_done_callback(lambda _: self._revalidating.pop(symbol, None))
+
+        def report(done: asyncio.Future):
+            if not done.cancelled() and done.exception():
+                print(f"Background refresh failed for {symbol}: {done.exception()}")
+
+        task.add_done_callback(report)
+
+    async def refresh(self, symbol: str, current_data: Optional[dict] = None) -> Optional[dict]:
+        """Recompute and cache a symbol at background priority, joining a computation already in flight"""
+        with background_priority():
+            task = self._shared_task(symbol, current_data)
+        return await asyncio.shield(task)
+
+    def refresh_blocking(self, symbol: str, current_data: Optional[dict] = None) -> Optional[dict]:
+        """
+        refresh() for scheduler threads. It runs on the API event loop, so the scheduled
+        job shares the lease and the single-flight with interactive requests.
+        """
+        if self._loop is None or self._loop.is_closed():
+            raise RuntimeError("analysis service is not bound to the API event loop")
+        return asyncio.run_coroutine_threadsafe(self.refresh(symbol, current_data), self._loop).result()
+
+    async def get_analysis(self, symbol: str) -> Optional[dict]:
+        """
+        Return cached analysis for a symbol, computing and caching it on a miss.
+        Expired entries are returned as is and refreshed in the background.
+        """
+        entry = cache_service.get_stock_analysis_entry(symbol)
+        if entry:
+            if not cache_service.is_fresh(entry):
+                self._revalidate(symbol)
+            return entry['data']
+
+        return await self._compute_shared(symbol)
+
+    def revalidate_expired(self, symbols: list[str]) -> int:
+        """Refresh the symbols whose entry expired or was evicted in the background; returns how many"""
+        entries = cache_service.get_stock_analysis_entries(symbols)
+        expired = [s for s in symbols if s not in entries or not cache_service.is_fresh(entries[s])]
+        for symbol in expired:
+            self._revalidate(symbol)
+        return len(expired)
+
+    async def get_many(self, symbols: list[str]) -> list[dict]:
+        """
+        Resolve analyses for many symbols at once.
+        Cache hits are read in a single round trip and expired ones are refreshed in
+        the background; only the misses are computed, concurrently but bounded by
+        DASHBOARD_CONCURRENCY. Symbols that cannot be resolved are left out.
+        Results keep the order of `symbols`.
+        """
+        symbols = [s.upper() for s in symbols]
+        entries = cache_service.get_stock_analysis_entries(symbols)
+        results = {}
+        for symbol, entry in entries.items():
+            if not cache_service.is_fresh(entry):
+                self._revalidate(symbol)
+            results[symbol] = entry['data']
+        misses = [s for s in symbols if s not in results]
+
+        if misses:
+            # All crypto quotes come from one batched CoinGecko call
+            crypto_quotes = {}
+            if any(StockService.is_crypto(s) for s in misses):
+                try:
+                    crypto_quotes = await CryptoService.get_current_prices_async()
+                except RateLimitExceeded as e:
+                    print(f"Skipping batched crypto quotes: {e}")
+
+            semaphore = asyncio.Semaphore(settings.DASHBOARD_CONCURRENCY)
+
+            async def compute(symbol: str):
+                async with semaphore:
+                    try:
+                        return symbol, await self._compute_shared(symbol, crypto_quotes.get(symbol))
+                    except RateLimitExceeded as e:
+                        print(f"Skipping {symbol}: {e}")
+                        return symbol, None
+                    except Exception as e:
+                        print(f"Error building analysis for {symbol}: {e}")
+                        return symbol, None
+
+            for symbol, data in await asyncio.gather(*(compute(s) for s in misses)):
+                if data:
+                    results[symbol] = data
+
+        return [results[s] for s in symbols if s in results]
+
+
+analysis_service = StockAnalysisService()
@@ -0,0 +1,34 @@
+import json
+import zlib
+import msgpack
+from typing import Any
+from app.config import get_settings
+
+settings = get_settings()
+
+# One-byte format prefix on every cached value
+MSGPACK = b'\x01'
+MSGPACK_ZLIB = b'\x02'
+
+
+def encode(value: Any) -> bytes:
+    """
+    Serialize a cache value as msgpack, zlib-compressed above CACHE_COMPRESS_MIN_BYTES.
+    Unsupported types (e.g. datetime) are stored as strings, as with json.dumps(default=str).
+    """
+    packed = msgpack.packb(value, default=str)
+    if len(packed) >= settings.CACHE_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(packed, 1)
+        if len(compressed) < len(packed):
+            return MSGPACK_ZLIB + compressed
+    return MSGPACK + packed
+
+
+def decode(data: bytes) -> Any:
+    """Inverse of encode; values written as JSON text by older versions are still readable"""
+    prefix, body = data[:1], data[1:]
+    if prefix == MSGPACK:
+        return msgpack.unpackb(body, strict_map_key=False)
+    if prefix == MSGPACK_ZLIB:
+        return msgpack.unpackb(zlib.decompress(body), strict_map_key=False)
+    return json.loads(data)
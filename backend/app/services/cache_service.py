@@ -1,48 +1,130 @@
 import redis
-import json
+import time
+import uuid
 from typing import Optional, Any
+from app.services.local_cache import LocalCache
+from app.services import cache_codec
+from app.services.market_session import analysis_ttl
 from app.config import get_settings
 
 settings = get_settings()
 
+# Keys rewritten or deleted by any worker are announced here so other workers drop their L1 copy
+INVALIDATION_CHANNEL = "cache:invalidate"
+
 
 class CacheService:
     def __init__(self):
+        # Identifies this process on the invalidation channel
+        self.instance_id = uuid.uuid4().hex
+        self.local = LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_TTL)
+        self._listener = None
+
         try:
+            # Text client for locks and pub/sub, binary client for encoded values
             self.redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self.binary_client = redis.from_url(settings.REDIS_URL)
             # Test connection
             self.redis_client.ping()
             self.enabled = True
+            self._start_listener()
         except Exception as e:
             print(f"Redis connection failed: {e}. Running without cache.")
             self.redis_client = None
+            self.binary_client = None
             self.enabled = False
 
+    def _start_listener(self):
+        """Subscribe to invalidations from other workers in a background thread"""
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+        self._listener = pubsub.run_in_thread(
+            sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+        )
+
+    def _on_invalidation(self, message: dict):
+        sender, _, key = message['data'].partition(' ')
+        if sender != self.instance_id:
+            self.local.invalidate(key)
+
+    def _on_listener_error(self, error: Exception, pubsub, thread):
+        # Invalidations may have been missed while disconnected
+        print(f"Cache invalidation listener error: {error}")
+        self.local.clear()
+        time.sleep(1.0)
+
+    def _publish_invalidation(self, key: str):
+        self.redis_client.publish(INVALIDATION_CHANNEL, f"{self.instance_id} {key}")
+
+    def close(self):
+        """Stop the invalidation listener"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
     def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if not self.enabled:
-            return None
+        """Get value from cache (in-process tier first, then Redis)"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list[str]) -> dict:
+        """
+        Get many values at once: L1 hits first, then one MGET for the rest.
+        Returns only the keys that were found.
+        """
+        if not self.enabled or not keys:
+            return {}
+
+        result = {}
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                result[key] = value
 
+        missing = [key for key in keys if key not in result]
+        if not missing:
+            return result
+
+        generation = self.local.generation
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            values = self.binary_client.mget(missing)
         except Exception as e:
             print(f"Cache get error: {e}")
-            return None
+            return result
+
+        for key, data in zip(missing, values):
+            if not data:
+                continue
+            try:
+                result[key] = cache_codec.decode(data)
+            except Exception as e:
+                print(f"Cache decode error for {key}: {e}")
+                continue
+            self.local.set(key, result[key], generation=generation)
+        return result
 
     def set(self, key: str, value: Any, ttl: int = 86400) -> bool:
         """
         Set value in cache with TTL (default 24 hours)
         ttl in seconds
         """
-        if not self.enabled:
+        return self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items: dict, ttl: int = 86400) -> bool:
+        """Set many values with one pipelined round trip, announcing each key to other workers"""
+        if not self.enabled or not items:
             return False
 
         try:
-            serialized = json.dumps(value, default=str)
-            self.redis_client.setex(key, ttl, serialized)
+            encoded = {key: cache_codec.encode(value) for key, value in items.items()}
+            pipe = self.binary_client.pipeline(transaction=False)
+            for key, data in encoded.items():
+                pipe.setex(key, ttl, data)
+                pipe.publish(INVALIDATION_CHANNEL, f"{self.instance_id} {key}")
+            pipe.execute()
+
+            # Cache the round-tripped values so L1 hits match what other workers read
+            for key, data in encoded.items():
+                self.local.set(key, cache_codec.decode(data), ttl=ttl)
             return True
         except Exception as e:
             print(f"Cache set error: {e}")
@@ -53,20 +135,118 @@ class CacheService:
         if not self.enabled:
             return False
 
+        self.local.invalidate(key)
         try:
             self.redis_client.delete(key)
+            self._publish_invalidation(key)
             return True
         except Exception as e:
             print(f"Cache delete error: {e}")
             return False
 
-    def get_stock_analysis(self, symbol: str) -> Optional[dict]:
-        """Get cached stock analysis"""
-        return self.get(f"stock_analysis:{symbol}")
+    # Deletes the lock only if it is still held by the caller's token
+    _RELEASE_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    # Resets the lock's expiry only if it is still held by the caller's token
+    _EXTEND_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        """
+        Try to take a short-lived lease shared by all workers.
+        Returns a token to release with, or None if another worker holds it.
+        Without Redis every caller gets the lease.
+        """
+        if not self.enabled:
+            return "local"
+
+        token = uuid.uuid4().hex
+        try:
+            if self.redis_client.set(f"lock:{name}", token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            print(f"Cache lock error: {e}")
+            return "local"
+
+    def extend_lock(self, name: str, token: str, ttl: int) -> bool:
+        """Keep a lease taken with acquire_lock for another `ttl` seconds; False if it was lost"""
+        if not self.enabled or token == "local":
+            return True
+
+        try:
+            return bool(self.redis_client.eval(self._EXTEND_LOCK_SCRIPT, 1, f"lock:{name}", token, ttl))
+        except Exception as e:
+            print(f"Cache lock renew error: {e}")
+            return False
+
+    def release_lock(self, name: str, token: str) -> bool:
+        """Release a lease taken with acquire_lock"""
+        if not self.enabled or token == "local":
+            return False
+
+        try:
+            return bool(self.redis_client.eval(self._RELEASE_LOCK_SCRIPT, 1, f"lock:{name}", token))
+        except Exception as e:
+            print(f"Cache unlock error: {e}")
+            return False
+
+    @staticmethod
+    def _analysis_entry(value: dict) -> dict:
+        # Entries written before stale-while-revalidate hold the bare payload; treat them as stale
+        if 'fresh_until' not in value:
+            return {'data': value, 'fresh_until': 0}
+        return value
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        return entry['fresh_until'] > time.time()
+
+    def get_stock_analysis_entry(self, symbol: str) -> Optional[dict]:
+        """Get the cached {'data', 'fresh_until'} entry for a symbol"""
+        value = self.get(f"stock_analysis:{symbol}")
+        return self._analysis_entry(value) if value else None
+
+    def get_stock_analysis_entries(self, symbols: list[str]) -> dict:
+        """Get cached analysis entries for many symbols in one round trip"""
+        values = self.get_many([f"stock_analysis:{s}" for s in symbols])
+        return {
+            s: self._analysis_entry(values[f"stock_analysis:{s}"])
+            for s in symbols
+            if f"stock_analysis:{s}" in values
+        }
+
+    def set_stock_analysis(self, symbol: str, data: dict, fresh_ttl: Optional[int] = None) -> bool:
+        """
+        Cache stock analysis, fresh for a market-session-aware TTL unless `fresh_ttl` is given.
+        It is kept CACHE_STALE_TTL longer so expired entries can be served while being recomputed.
+        """
+        return self.set_stock_analyses({symbol: data}, fresh_ttl)
+
+    def set_stock_analyses(self, analyses: dict, fresh_ttl: Optional[int] = None) -> bool:
+        """Cache analyses for many symbols, one round trip per distinct TTL"""
+        by_ttl: dict[int, dict] = {}
+        now = time.time()
+        for symbol, data in analyses.items():
+            ttl = fresh_ttl or analysis_ttl(symbol)
+            by_ttl.setdefault(ttl, {})[f"stock_analysis:{symbol}"] = {
+                'data': data,
+                'fresh_until': now + ttl,
+            }
 
-    def set_stock_analysis(self, symbol: str, data: dict) -> bool:
-        """Cache stock analysis for 24 hours"""
-        return self.set(f"stock_analysis:{symbol}", data, ttl=86400)
+        ok = True
+        for ttl, items in by_ttl.items():
+            ok = self.set_many(items, ttl=ttl + settings.CACHE_STALE_TTL) and ok
+        return ok and bool(by_ttl)
 
 
 # Global cache instance
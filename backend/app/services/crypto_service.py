@@ -1,7 +1,11 @@
-import requests
+import time
 from typing import Optional
 from datetime import datetime, timedelta
-import statistics
+from app.services.http_client import get_sync_session, get_async_client
+from app.services.rate_limiter import coingecko_limiter, RateLimitExceeded
+from app.config import get_settings
+
+settings = get_settings()
 
 
 class CryptoService:
@@ -23,185 +27,225 @@ class CryptoService:
         'LINK-USD': 'chainlink',
     }
 
+    # Display names for the ids above (avoids a /coins/{id} call just to read the name)
+    COIN_NAMES = {
+        'bitcoin': 'Bitcoin',
+        'ethereum': 'Ethereum',
+        'solana': 'Solana',
+        'dogecoin': 'Dogecoin',
+        'cardano': 'Cardano',
+        'ripple': 'XRP',
+        'polkadot': 'Polkadot',
+        'matic-network': 'Polygon',
+        'avalanche-2': 'Avalanche',
+        'chainlink': 'Chainlink',
+    }
+
+    # Last batched quote snapshot, shared by all callers for CRYPTO_QUOTE_TTL seconds
+    _quotes: dict = {}
+    _quotes_at: float = float('-inf')
+
     @staticmethod
     def get_coingecko_id(symbol: str) -> Optional[str]:
         """Convert symbol (e.g., BTC-USD) to CoinGecko ID (e.g., bitcoin)"""
         return CryptoService.SYMBOL_MAP.get(symbol.upper())
 
     @staticmethod
-    def get_current_price(symbol: str) -> Optional[dict]:
-        """Get current crypto price and 24h change from CoinGecko"""
-        try:
-            coin_id = CryptoService.get_coingecko_id(symbol)
-            if not coin_id:
-                print(f"Unknown crypto symbol: {symbol}")
-                return None
+    def _check_limit(status_code: int, headers) -> None:
+        """CoinGecko signals quota exhaustion with HTTP 429"""
+        if status_code == 429:
+            retry_after = float(headers.get('Retry-After', 60))
+            print(f"CoinGecko API limit reached, retry in {retry_after:.0f}s")
+            coingecko_limiter.exhaust(retry_after)
+            raise RateLimitExceeded(coingecko_limiter.name, retry_after)
 
-            # Fetch data from CoinGecko
-            url = f"{CryptoService.BASE_URL}/coins/{coin_id}"
-            params = {
-                'localization': 'false',
-                'tickers': 'false',
-                'market_data': 'true',
-                'community_data': 'false',
-                'developer_data': 'false',
-                'sparkline': 'false'
-            }
+    @staticmethod
+    def _request(path: str, params: dict) -> dict:
+        """Blocking GET against the CoinGecko API"""
+        coingecko_limiter.acquire()
+        url = f"{CryptoService.BASE_URL}{path}"
+        response = get_sync_session().get(url, params=params, timeout=settings.HTTP_TIMEOUT)
+        CryptoService._check_limit(response.status_code, response.headers)
+        response.raise_for_status()
+        return response.json()
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+    @staticmethod
+    async def _request_async(path: str, params: dict) -> dict:
+        """Non-blocking GET against the CoinGecko API"""
+        await coingecko_limiter.acquire_async()
+        url = f"{CryptoService.BASE_URL}{path}"
+        response = await get_async_client(url).get(url, params=params)
+        CryptoService._check_limit(response.status_code, response.headers)
+        response.raise_for_status()
+        return response.json()
 
-            # Extract price data
-            market_data = data.get('market_data', {})
-            current_price = market_data.get('current_price', {}).get('usd')
-            price_change_24h = market_data.get('price_change_24h')
-            price_change_percentage_24h = market_data.get('price_change_percentage_24h')
+    @staticmethod
+    def _quote_params() -> dict:
+        # One lightweight call covers every supported coin
+        return {
+            'ids': ','.join(CryptoService.SYMBOL_MAP.values()),
+            'vs_currencies': 'usd',
+            'include_24hr_change': 'true',
+        }
 
+    @staticmethod
+    def _parse_quotes(data: dict) -> dict:
+        """Convert a /simple/price response into quotes keyed by symbol"""
+        quotes = {}
+        for symbol, coin_id in CryptoService.SYMBOL_MAP.items():
+            coin = data.get(coin_id, {})
+            current_price = coin.get('usd')
             if not current_price:
-                return None
+                continue
 
-            return {
+            # CoinGecko only returns the percentage; derive the absolute change from it
+            change_percent = coin.get('usd_24h_change')
+            change = None
+            if change_percent is not None:
+                change = current_price - current_price / (1 + change_percent / 100)
+
+            quotes[symbol] = {
                 'symbol': symbol,
-                'name': data.get('name', symbol),
+                'name': CryptoService.COIN_NAMES.get(coin_id, symbol),
                 'current_price': current_price,
-                'change_24h': price_change_24h,
-                'change_24h_percent': price_change_percentage_24h,
+                'change_24h': change,
+                'change_24h_percent': change_percent,
             }
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching crypto data for {symbol}: {e}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error fetching crypto data for {symbol}: {e}")
-            return None
+        CryptoService._quotes = quotes
+        CryptoService._quotes_at = time.monotonic()
+        return quotes
 
     @staticmethod
-    def validate_symbol(symbol: str) -> bool:
-        """Check if crypto symbol is supported"""
-        return symbol.upper() in CryptoService.SYMBOL_MAP
+    def _fresh_quotes() -> Optional[dict]:
+        if time.monotonic() - CryptoService._quotes_at < settings.CRYPTO_QUOTE_TTL:
+            return CryptoService._quotes
+        return None
 
     @staticmethod
-    def get_historical_data(symbol: str, days: int = 365) -> Optional[list]:
-        """Get historical price data from CoinGecko"""
-        try:
-            coin_id = CryptoService.get_coingecko_id(symbol)
-            if not coin_id:
-                return None
-
-            url = f"{CryptoService.BASE_URL}/coins/{coin_id}/market_chart"
-            params = {
-                'vs_currency': 'usd',
-                'days': days,
-                'interval': 'daily'
-            }
+    def get_current_prices() -> dict:
+        """Current price and 24h change for every supported coin, keyed by symbol"""
+        quotes = CryptoService._fresh_quotes()
+        if quotes is not None:
+            return quotes
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        try:
+            data = CryptoService._request("/simple/price", CryptoService._quote_params())
+            return CryptoService._parse_quotes(data)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching crypto quotes: {e}")
+            return {}
 
-            # Extract prices [timestamp, price]
-            prices = data.get('prices', [])
-            return [{'timestamp': p[0], 'price': p[1]} for p in prices]
+    @staticmethod
+    async def get_current_prices_async() -> dict:
+        """Non-blocking variant of get_current_prices"""
+        quotes = CryptoService._fresh_quotes()
+        if quotes is not None:
+            return quotes
 
+        try:
+            data = await CryptoService._request_async("/simple/price", CryptoService._quote_params())
+            return CryptoService._parse_quotes(data)
+        except RateLimitExceeded:
+            raise
         except Exception as e:
-            print(f"Error fetching historical data for {symbol}: {e}")
-            return None
+            print(f"Error fetching crypto quotes: {e}")
+            return {}
 
     @staticmethod
-    def calculate_moving_averages(prices: list, current_price: float) -> dict:
-        """Calculate moving averages from historical price data"""
-        if not prices or len(prices) < 50:
-            return {
-                'ma_50': None,
-                'ma_100': None,
-                'ma_150': None,
-                'ma_200_day': None,
-                'ma_200_week': None,
-            }
+    def get_current_price(symbol: str) -> Optional[dict]:
+        """Get current crypto price and 24h change from CoinGecko"""
+        if not CryptoService.get_coingecko_id(symbol):
+            print(f"Unknown crypto symbol: {symbol}")
+            return None
 
-        # Extract just the price values
-        price_values = [p['price'] for p in prices]
+        return CryptoService.get_current_prices().get(symbol.upper())
 
-        def calc_ma(days):
-            if len(price_values) >= days:
-                return statistics.mean(price_values[-days:])
+    @staticmethod
+    async def get_current_price_async(symbol: str) -> Optional[dict]:
+        """Non-blocking variant of get_current_price"""
+        if not CryptoService.get_coingecko_id(symbol):
+            print(f"Unknown crypto symbol: {symbol}")
             return None
 
-        # Calculate moving averages
-        ma_50 = calc_ma(50)
-        ma_100 = calc_ma(100)
-        ma_150 = calc_ma(150)
-        ma_200_day = calc_ma(200)
+        quotes = await CryptoService.get_current_prices_async()
+        return quotes.get(symbol.upper())
 
-        # 200-week MA = 200 weeks * 7 days = 1400 days (approx)
-        # But we only have 365 days, so use 52 weeks = 364 days
-        ma_200_week = calc_ma(min(364, len(price_values)))
+    @staticmethod
+    def validate_symbol(symbol: str) -> bool:
+        """Check if crypto symbol is supported"""
+        return symbol.upper() in CryptoService.SYMBOL_MAP
 
+    @staticmethod
+    def _history_params(days: int) -> dict:
         return {
-            'ma_50': ma_50,
-            'ma_100': ma_100,
-            'ma_150': ma_150,
-            'ma_200_day': ma_200_day,
-            'ma_200_week': ma_200_week,
+            'vs_currency': 'usd',
+            'days': days,
+            'interval': 'daily'
         }
 
     @staticmethod
-    def calculate_52week_range(prices: list, current_price: float) -> dict:
-        """Calculate 52-week high/low from historical data"""
-        if not prices or len(prices) < 365:
-            return {
-                'week_52_high': None,
-                'week_52_low': None,
-                'current_price': current_price,
-                'position_percent': None,
+    def _parse_market_chart(data: dict) -> list:
+        """Convert a /market_chart response into daily bars sorted by date"""
+        # Extract prices [timestamp, price] and volumes [timestamp, volume]
+        # CoinGecko only provides a single daily price, so it doubles as open/high/low.
+        # The last point is the live price for today and replaces today's midnight point.
+        volumes = {datetime.utcfromtimestamp(v[0] / 1000).date(): v[1] for v in data.get('total_volumes', [])}
+        bars = {}
+        for timestamp, price in data.get('prices', []):
+            day = datetime.utcfromtimestamp(timestamp / 1000).date()
+            bars[day] = {
+                'date': day.isoformat(),
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'volume': volumes.get(day),
             }
 
-        # Get last 365 days of prices
-        recent_prices = [p['price'] for p in prices[-365:]]
+        return [bars[day] for day in sorted(bars)]
 
-        week_52_high = max(recent_prices)
-        week_52_low = min(recent_prices)
+    @staticmethod
+    def get_historical_data(symbol: str, days: int = 365) -> Optional[list]:
+        """Get historical price data from CoinGecko"""
+        try:
+            coin_id = CryptoService.get_coingecko_id(symbol)
+            if not coin_id:
+                return None
 
-        # Calculate position percentage
-        price_range = week_52_high - week_52_low
-        if price_range > 0:
-            position_percent = ((current_price - week_52_low) / price_range) * 100
-        else:
-            position_percent = 50.0
+            data = CryptoService._request(f"/coins/{coin_id}/market_chart", CryptoService._history_params(days))
+            return CryptoService._parse_market_chart(data)
 
-        return {
-            'week_52_high': week_52_high,
-            'week_52_low': week_52_low,
-            'current_price': current_price,
-            'position_percent': position_percent,
-        }
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching historical data for {symbol}: {e}")
+            return None
 
     @staticmethod
-    def get_crypto_info(symbol: str) -> dict:
-        """Get basic crypto info (name)"""
-        coin_id = CryptoService.get_coingecko_id(symbol)
-        if not coin_id:
-            return {'name': symbol, 'sector': 'Cryptocurrency'}
-
+    async def get_historical_data_async(symbol: str, days: int = 365) -> Optional[list]:
+        """Non-blocking variant of get_historical_data"""
         try:
-            url = f"{CryptoService.BASE_URL}/coins/{coin_id}"
-            params = {
-                'localization': 'false',
-                'tickers': 'false',
-                'market_data': 'false',
-                'community_data': 'false',
-                'developer_data': 'false'
-            }
+            coin_id = CryptoService.get_coingecko_id(symbol)
+            if not coin_id:
+                return None
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await CryptoService._request_async(f"/coins/{coin_id}/market_chart", CryptoService._history_params(days))
+            return CryptoService._parse_market_chart(data)
 
-            return {
-                'name': data.get('name', symbol),
-                'sector': 'Cryptocurrency'
-            }
+        except RateLimitExceeded:
+            raise
         except Exception as e:
-            print(f"Error fetching crypto info for {symbol}: {e}")
-            return {'name': symbol, 'sector': 'Cryptocurrency'}
+            print(f"Error fetching historical data for {symbol}: {e}")
+            return None
+
+    @staticmethod
+    def get_crypto_info(symbol: str) -> dict:
+        """Get basic crypto info (name)"""
+        coin_id = CryptoService.get_coingecko_id(symbol)
+        return {
+            'name': CryptoService.COIN_NAMES.get(coin_id, symbol),
+            'sector': 'Cryptocurrency'
+        }
@@ -0,0 +1,47 @@
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from app.config import get_settings
+
+settings = get_settings()
+
+# Shared keep-alive connection pools for upstream market-data providers.
+# Async clients serve the API event loop; the requests session serves the
+# synchronous callers (scheduler, startup migration).
+
+_async_clients: dict[str, httpx.AsyncClient] = {}
+
+_sync_session = requests.Session()
+_sync_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=4, pool_maxsize=settings.HTTP_POOL_SIZE),
+)
+
+
+def get_sync_session() -> requests.Session:
+    """Pooled session for blocking callers"""
+    return _sync_session
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Pooled async client for the upstream host serving `url` (one per host)"""
+    host = urlsplit(url).netloc
+    client = _async_clients.get(host)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_SIZE,
+                max_keepalive_connections=settings.HTTP_POOL_SIZE,
+            ),
+        )
+        _async_clients[host] = client
+    return client
+
+
+async def close_async_clients():
+    """Close all pooled async clients (called on shutdown)"""
+    for client in _async_clients.values():
+        await client.aclose()
+    _async_clients.clear()
@@ -0,0 +1,72 @@
+import hashlib
+import io
+from PIL import Image
+
+# dHash compares each pixel of a 9x8 thumbnail with its right neighbour: 64 bits
+DHASH_SIZE = 8
+
+# Near-duplicate lookup splits the hash into 16-bit bands (multi-index hashing). Hashes within
+# d bits of each other have a band differing in at most d // 4 bits, so probing every value
+# that close to each band finds all of them. Bands this wide rarely match by chance.
+DHASH_BANDS = 4
+BAND_BITS = 16
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+# A blank strip of the thumbnail gives an all-zero (or all-one) band; unrelated screenshots
+# with large plain regions share it, so it is neither stored nor probed (a near-duplicate
+# whose only close band is blank is then missed)
+_UNIFORM_BANDS = (0, _BAND_MASK)
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 of the uploaded bytes; equal only for byte-identical files"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def dhash(content: bytes) -> int:
+    """
+    Perceptual difference hash of an image, as a signed 64-bit int (fits a BIGINT column).
+    Survives recompression, rescaling and small crops; raises if the bytes are not an image.
+    """
+    with Image.open(io.BytesIO(content)) as image:
+        # JPEG decoders can downscale while decoding, which skips most of the work
+        image.draft('L', (DHASH_SIZE * 16, DHASH_SIZE * 16))
+        thumbnail = image.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+
+    pixels = list(thumbnail.getdata())
+    value = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = pixels[row * (DHASH_SIZE + 1) + col]
+            right = pixels[row * (DHASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _bands(value: int) -> list[int]:
+    value &= (1 << 64) - 1
+    return [(value >> (band * BAND_BITS)) & _BAND_MASK for band in range(DHASH_BANDS)]
+
+
+def dhash_bands(value: int) -> list[int]:
+    """Band keys stored for a dHash (band index in the high bits), matched with && through a GIN index"""
+    return [(band << BAND_BITS) | bits for band, bits in enumerate(_bands(value)) if bits not in _UNIFORM_BANDS]
+
+
+def dhash_band_probes(value: int, max_distance: int) -> list[int]:
+    """Band keys of every stored hash that may lie within `max_distance` bits of `value`"""
+    radius = max_distance // DHASH_BANDS
+    flips = {0}
+    for _ in range(radius):
+        flips |= {f | (1 << bit) for f in flips for bit in range(BAND_BITS)}
+    keys = set()
+    for band, bits in enumerate(_bands(value)):
+        for flip in flips:
+            if bits ^ flip not in _UNIFORM_BANDS:
+                keys.add((band << BAND_BITS) | (bits ^ flip))
+    return sorted(keys)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+    Thread-safe; used as the L1 tier in front of Redis.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a read racing with one does not repopulate stale data
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """
+        Store a value for at most the L1 TTL.
+        `generation` is the value read before fetching from Redis; the store is skipped if
+        an invalidation arrived in between.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
@@ -0,0 +1,119 @@
+import time as clock
+from datetime import datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+from app.database.session import SessionLocal
+from app.models.watchlist import Watchlist
+from app.services.stock_service import StockService
+from app.config import get_settings
+
+settings = get_settings()
+
+# Regular trading sessions: (timezone, open, close), Monday to Friday
+US_SESSION = (ZoneInfo("America/New_York"), time(9, 30), time(16, 0))
+
+# Alpha Vantage exchange suffixes with a session other than the US one
+EXCHANGE_SESSIONS = {
+    'LON': (ZoneInfo("Europe/London"), time(8, 0), time(16, 30)),
+    'DEX': (ZoneInfo("Europe/Berlin"), time(9, 0), time(17, 30)),
+    'TRT': (ZoneInfo("America/Toronto"), time(9, 30), time(16, 0)),
+}
+
+
+# Quotes keep short TTLs for a while after the close so the final price is picked up
+CLOSE_SETTLE = timedelta(minutes=30)
+
+# Alpha Vantage calls per stock per day outside the intraday quotes: the history tail
+# and the quote once the close has settled
+DAILY_FIXED_CALLS = 2
+
+# Seconds the watchlist stock count is reused before it is read again
+TRACKED_COUNT_TTL = 300
+
+_tracked = (0, 0.0)  # (stock count, monotonic time it was read)
+
+
+def exchange_session(symbol: str) -> tuple:
+    """Trading session for a stock symbol, from its exchange suffix (e.g. TSCO.LON)"""
+    if '.' not in symbol:
+        return US_SESSION
+    return EXCHANGE_SESSIONS.get(symbol.rpartition('.')[2].upper(), US_SESSION)
+
+
+def next_open(session: tuple, now: datetime) -> datetime:
+    """Start of the next regular session after `now` (holidays are not modelled)"""
+    tz, open_time, _ = session
+    local = now.astimezone(tz)
+    day = local.date()
+    if local.time() >= open_time:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, open_time, tzinfo=tz)
+
+
+def is_active(session: tuple, now: datetime) -> bool:
+    """Whether prices can still move: during the session or shortly after the close"""
+    tz, open_time, close_time = session
+    local = now.astimezone(tz)
+    if local.weekday() >= 5:
+        return False
+
+    opens = datetime.combine(local.date(), open_time, tzinfo=tz)
+    closes = datetime.combine(local.date(), close_time, tzinfo=tz) + CLOSE_SETTLE
+    return opens <= local < closes
+
+
+def tracked_stock_count() -> int:
+    """Stocks on the watchlist (crypto quotes do not use the Alpha Vantage quota)"""
+    global _tracked
+    count, read_at = _tracked
+    if read_at and clock.monotonic() - read_at < TRACKED_COUNT_TTL:
+        return count
+
+    db = SessionLocal()
+    try:
+        symbols = [row.symbol for row in db.query(Watchlist.symbol).all()]
+        count = sum(1 for symbol in symbols if not StockService.is_crypto(symbol))
+    except Exception as e:
+        print(f"Could not count watchlist stocks: {e}")
+    finally:
+        db.close()
+
+    _tracked = (count, clock.monotonic())
+    return count
+
+
+def market_open_ttl(session: tuple, stocks: int) -> int:
+    """
+    Intraday TTL that keeps `stocks` symbols within the daily Alpha Vantage quota.
+    Each recompute costs one GLOBAL_QUOTE call, so the session is split into as many
+    refreshes as the quota allows after the fixed daily calls; never below
+    CACHE_TTL_MARKET_OPEN. A quota too small for even that refreshes once per session.
+    """
+    tz, open_time, close_time = session
+    day = datetime.now(tz).date()
+    active = (datetime.combine(day, close_time) - datetime.combine(day, open_time) + CLOSE_SETTLE).total_seconds()
+
+    spare = settings.ALPHAVANTAGE_REQUESTS_PER_DAY - DAILY_FIXED_CALLS * stocks
+    if spare <= 0:
+        return int(active)
+    return max(settings.CACHE_TTL_MARKET_OPEN, int(active * stocks / spare))
+
+
+def analysis_ttl(symbol: str, now: Optional[datetime] = None) -> int:
+    """
+    Seconds a cached analysis stays fresh.
+    Crypto trades around the clock; stocks are short-lived during their session (as
+    short as the Alpha Vantage quota allows for the watchlist) and stay fresh until
+    the next open once the closing price has settled.
+    """
+    if StockService.is_crypto(symbol):
+        return settings.CACHE_TTL_CRYPTO
+
+    now = now or datetime.now(ZoneInfo("UTC"))
+    session = exchange_session(symbol)
+    if is_active(session, now):
+        return market_open_ttl(session, max(tracked_stock_count(), 1))
+
+    return max(settings.CACHE_TTL_MARKET_OPEN, int((next_open(session, now) - now).total_seconds()))
@@ -1,49 +1,100 @@
 import pytesseract
-from PIL import Image
-import re
+import numpy as np
+from PIL import Image, ImageOps
 from typing import List, Optional
+from app.config import get_settings
+from app.services.ticker_universe import ticker_universe
+
+settings = get_settings()
+
+# Preprocessing presets, selected with OCR_PREPROCESS. Keys:
+#   max_width  downscale wider images to this many pixels (retina screenshots are 2-3x)
+#   grayscale  drop color before thresholding
+#   invert     invert dark-mode images (light text on dark background)
+#   binarize   Otsu threshold to pure black/white
+#   crop       trim uniform margins around the text
+#   psm        Tesseract page segmentation mode (3 = auto, 4 = single column, 6 = single block);
+#              presets with it also select the LSTM engine (--oem 1)
+OCR_PRESETS = {
+    'raw': {},  # Tesseract defaults on the untouched image, as before presets existed
+    'fast': {'max_width': 1200, 'grayscale': True, 'invert': True, 'psm': 6},
+    'screenshot': {'max_width': 1600, 'grayscale': True, 'invert': True, 'binarize': True, 'crop': True, 'psm': 4},
+    'accurate': {'max_width': 2400, 'grayscale': True, 'invert': True, 'binarize': True, 'crop': True, 'psm': 3},
+}
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Threshold maximizing between-class variance of a uint8 image"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(variance.argmax())
 
 
 class OCRService:
-    def extract_text_from_screenshot(self, image_path: str) -> str:
-        """Extract all text from screenshot using Tesseract OCR"""
+    def preprocess(self, image: Image.Image, options: dict) -> Image.Image:
+        """Apply a preprocessing preset before OCR"""
+        max_width = options.get('max_width')
+        if max_width and image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.LANCZOS)
+
+        if options.get('grayscale'):
+            image = image.convert('L')
+
+        if options.get('invert') and image.mode == 'L':
+            # Dark mode: mostly dark pixels means light text on a dark background
+            if np.asarray(image).mean() < 128:
+                image = ImageOps.invert(image)
+
+        if options.get('binarize') and image.mode == 'L':
+            gray = np.asarray(image)
+            image = Image.fromarray(np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8))
+
+        if options.get('crop') and image.mode == 'L':
+            # Bounding box of the dark (text) pixels, with a margin Tesseract needs
+            box = ImageOps.invert(image).point(lambda v: 255 if v > 64 else 0).getbbox()
+            if box:
+                margin = 10
+                image = image.crop((
+                    max(box[0] - margin, 0), max(box[1] - margin, 0),
+                    min(box[2] + margin, image.width), min(box[3] + margin, image.height),
+                ))
+
+        return image
+
+    def extract_text_from_screenshot(
+        self,
+        image_path: str,
+        raise_errors: bool = False,
+        preset: Optional[str] = None,
+    ) -> str:
+        """Extract all text from screenshot using Tesseract OCR after preprocessing"""
+        options = OCR_PRESETS[preset or settings.OCR_PREPROCESS]
         try:
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image)
+            with Image.open(image_path) as image:
+                image = self.preprocess(image.convert('RGB'), options)
+            config = f"--oem 1 --psm {options['psm']}" if 'psm' in options else ""
+            text = pytesseract.image_to_string(image, config=config)
             return text
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"OCR error: {e}")
             return ""
 
     def extract_tickers(self, text: str) -> List[str]:
         """
-        Find stock tickers in text (e.g., $AAPL, TSLA)
-        Pattern: $TICKER or uppercase 1-5 letter words
+        Find known tickers in text (e.g., $AAPL, TSLA, $BTC -> BTC-USD)
+        Candidates are checked against the bundled ticker universe, so ordinary
+        uppercase words are not reported and no network call is made
         """
-        # Pattern 1: $TICKER format
-        dollar_pattern = r'\$([A-Z]{1,5})\b'
-        dollar_matches = re.findall(dollar_pattern, text)
-
-        # Pattern 2: Standalone uppercase 2-5 letter words (excluding common words)
-        word_pattern = r'\b([A-Z]{2,5})\b'
-        word_matches = re.findall(word_pattern, text)
-
-        # Common words to exclude
-        excluded_words = {
-            'THE', 'AND', 'FOR', 'ARE', 'BUT', 'NOT', 'YOU', 'ALL', 'CAN',
-            'HER', 'WAS', 'ONE', 'OUR', 'OUT', 'DAY', 'GET', 'HAS', 'HIM',
-            'HIS', 'HOW', 'ITS', 'MAY', 'NEW', 'NOW', 'OLD', 'SEE', 'TWO',
-            'WAY', 'WHO', 'BOY', 'DID', 'ITS', 'LET', 'PUT', 'SAY', 'SHE',
-            'TOO', 'USE', 'USA', 'USD', 'EUR', 'GBP', 'JPY', 'CEO', 'CFO',
-            'IPO', 'ETF', 'ESG', 'GDP', 'CPI', 'API', 'FAQ', 'PDF', 'URL',
-            'HTTP', 'WWW', 'COM', 'ORG', 'NET', 'GOV', 'EDU', 'BTC', 'ETH',
-        }
-
-        # Combine and filter
-        all_tickers = set(dollar_matches + word_matches)
-        valid_tickers = [t for t in all_tickers if t not in excluded_words]
-
-        return sorted(list(set(valid_tickers)))
+        return ticker_universe.extract(text)
 
     def extract_investment_thesis(self, text: str) -> str:
         """
@@ -0,0 +1,217 @@
+import asyncio
+import numpy as np
+from sqlalchemy import select, func, cast, Integer
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime, date, timedelta, timezone
+from app.models.price_history import PriceHistory, price_history_weekly, upsert_price_bars
+from app.database.timescale import timescale_enabled
+from app.services.crypto_service import CryptoService
+from app.services.alphavantage_service import AlphaVantageService
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.technical_analysis import TechnicalAnalysisService
+from app.services.downsampling import lttb_indices
+
+
+class PriceHistoryService:
+    """Keeps daily OHLCV bars in price_history and fetches only the missing tail"""
+
+    # Alpha Vantage 'compact' returns the latest 100 trading days
+    COMPACT_MAX_GAP_DAYS = 100
+
+    # CoinGecko history requested on first load
+    CRYPTO_FULL_DAYS = 365
+
+    @staticmethod
+    def _to_datetime(day: str) -> datetime:
+        """Convert a YYYY-MM-DD bar date into the stored UTC timestamp"""
+        return datetime.combine(date.fromisoformat(day), datetime.min.time(), tzinfo=timezone.utc)
+
+    @staticmethod
+    def get_last_date(db: Session, symbol: str) -> Optional[date]:
+        """Date of the most recent stored bar for a symbol"""
+        row = (
+            db.query(PriceHistory.date)
+            .filter(PriceHistory.symbol == symbol)
+            .order_by(PriceHistory.date.desc())
+            .first()
+        )
+        return row.date.date() if row else None
+
+    @staticmethod
+    def store_bars(db: Session, symbol: str, bars: list[dict]) -> int:
+        """
+        Merge bars into price_history in one bulk upsert.
+        Bars already stored for the same date are overwritten (e.g. today's partial bar).
+        """
+        if not bars:
+            return 0
+
+        rows = [
+            {
+                'symbol': symbol,
+                'date': PriceHistoryService._to_datetime(bar['date']),
+                'open': bar.get('open'),
+                'high': bar.get('high'),
+                'low': bar.get('low'),
+                'close': bar['close'],
+                'volume': bar.get('volume'),
+            }
+            for bar in bars
+        ]
+        upsert_price_bars(db, rows)
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def load_arrays(db: Session, symbol: str, since: Optional[date] = None) -> tuple:
+        """
+        Stored bars for a symbol as indicator-engine arrays (dates, closes, highs, lows), oldest first.
+        Dates are converted to epoch days in SQL so no per-row datetime objects are built.
+        """
+        epoch_day = cast(func.floor(func.extract('epoch', PriceHistory.date) / 86400), Integer)
+        query = select(epoch_day, PriceHistory.close, PriceHistory.high, PriceHistory.low).where(
+            PriceHistory.symbol == symbol
+        )
+        if since:
+            query = query.where(PriceHistory.date >= PriceHistoryService._to_datetime(since.isoformat()))
+
+        rows = db.execute(query.order_by(PriceHistory.date)).all()
+        return TechnicalAnalysisService.rows_to_arrays(rows)
+
+    @staticmethod
+    def load_chart(db: Session, symbol: str, days: int, max_points: int) -> list[dict]:
+        """
+        Closing prices over the last `days` calendar days of stored bars,
+        downsampled with LTTB to at most `max_points` points.
+        """
+        last_date = PriceHistoryService.get_last_date(db, symbol)
+        if not last_date:
+            return []
+
+        dates, closes, _, _ = PriceHistoryService.load_arrays(db, symbol, since=last_date - timedelta(days=days))
+        keep = lttb_indices(dates.astype(np.int64), closes, max_points)
+
+        return [
+            {'date': day.isoformat(), 'price': price}
+            for day, price in zip(dates[keep].tolist(), closes[keep].tolist())
+        ]
+
+    @staticmethod
+    def load_weekly_closes(db: Session, symbol: str, weeks: int) -> np.ndarray:
+        """
+        Closes of the last `weeks` Monday-based weeks, oldest first.
+        Read from the weekly continuous aggregate when TimescaleDB is set up,
+        otherwise derived from the stored daily bars.
+        """
+        if timescale_enabled():
+            query = (
+                select(price_history_weekly.c.close)
+                .where(price_history_weekly.c.symbol == symbol)
+                .order_by(price_history_weekly.c.bucket.desc())
+                .limit(weeks)
+            )
+            closes = db.execute(query).scalars().all()
+            return np.array(closes[::-1], dtype=np.float64)
+
+        last_date = PriceHistoryService.get_last_date(db, symbol)
+        if not last_date:
+            return np.array([], dtype=np.float64)
+
+        dates, closes, _, _ = PriceHistoryService.load_arrays(db, symbol, since=last_date - timedelta(weeks=weeks + 1))
+        return TechnicalAnalysisService.weekly_closes(dates, closes)[-weeks:]
+
+    @staticmethod
+    def _fetch_plan(is_crypto: bool, last_date: Optional[date]) -> dict:
+        """Provider arguments covering the bars missing after `last_date`"""
+        gap_days = (date.today() - last_date).days if last_date else None
+
+        if is_crypto:
+            if gap_days is None:
+                days = PriceHistoryService.CRYPTO_FULL_DAYS
+            else:
+                days = min(max(gap_days + 1, 2), PriceHistoryService.CRYPTO_FULL_DAYS)
+            return {'days': days}
+
+        if gap_days is None or gap_days > PriceHistoryService.COMPACT_MAX_GAP_DAYS:
+            return {'outputsize': 'full'}
+        return {'outputsize': 'compact'}
+
+    @staticmethod
+    def _trim(bars: Optional[list], last_date: Optional[date]) -> Optional[list]:
+        # The last stored day is kept so a partial bar gets finalized
+        if bars and last_date:
+            bars = [b for b in bars if b['date'] >= last_date.isoformat()]
+        return bars
+
+    @staticmethod
+    def fetch_missing_bars(symbol: str, is_crypto: bool, last_date: Optional[date]) -> Optional[list]:
+        """Fetch bars from the upstream provider starting at the last stored date"""
+        plan = PriceHistoryService._fetch_plan(is_crypto, last_date)
+        if is_crypto:
+            bars = CryptoService.get_historical_data(symbol, **plan)
+        else:
+            bars = AlphaVantageService.get_historical_data(symbol, **plan)
+
+        return PriceHistoryService._trim(bars, last_date)
+
+    @staticmethod
+    async def fetch_missing_bars_async(symbol: str, is_crypto: bool, last_date: Optional[date]) -> Optional[list]:
+        """Non-blocking variant of fetch_missing_bars"""
+        plan = PriceHistoryService._fetch_plan(is_crypto, last_date)
+        if is_crypto:
+            bars = await CryptoService.get_historical_data_async(symbol, **plan)
+        else:
+            bars = await AlphaVantageService.get_historical_data_async(symbol, **plan)
+
+        return PriceHistoryService._trim(bars, last_date)
+
+    @staticmethod
+    def _merge(db: Session, symbol: str, bars: Optional[list]) -> list[dict]:
+        """Store freshly fetched bars, returning the ones that were merged"""
+        if not bars:
+            return []
+
+        try:
+            PriceHistoryService.store_bars(db, symbol, bars)
+            return bars
+        except Exception as e:
+            print(f"Error storing price history for {symbol}: {e}")
+            db.rollback()
+            return []
+
+    @staticmethod
+    def sync_history(db: Session, symbol: str, is_crypto: bool) -> list[dict]:
+        """
+        Bring stored history up to date and return the bars that were merged.
+        Leaves stored history as is if the upstream fetch fails or is rate limited.
+        """
+        last_date = PriceHistoryService.get_last_date(db, symbol)
+
+        bars = None
+        if last_date != date.today():
+            try:
+                bars = PriceHistoryService.fetch_missing_bars(symbol, is_crypto, last_date)
+            except RateLimitExceeded as e:
+                # Serve stored bars; the tail is picked up on the next refresh
+                if not last_date:
+                    raise
+                print(f"Skipping history refresh for {symbol}: {e}")
+
+        return PriceHistoryService._merge(db, symbol, bars)
+
+    @staticmethod
+    async def sync_history_async(db: Session, symbol: str, is_crypto: bool) -> list[dict]:
+        """Non-blocking variant of sync_history; database work runs in a worker thread"""
+        last_date = await asyncio.to_thread(PriceHistoryService.get_last_date, db, symbol)
+
+        bars = None
+        if last_date != date.today():
+            try:
+                bars = await PriceHistoryService.fetch_missing_bars_async(symbol, is_crypto, last_date)
+            except RateLimitExceeded as e:
+                if not last_date:
+                    raise
+                print(f"Skipping history refresh for {symbol}: {e}")
+
+        return await asyncio.to_thread(PriceHistoryService._merge, db, symbol, bars)
@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+# Request priorities (lower value is served first)
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar('upstream_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """Mark upstream calls made inside this block as background work"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider quota cannot be satisfied within the allowed wait"""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} rate limit exceeded, retry in {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously over `period` seconds"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if one is available now)"""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class ProviderRateLimiter:
+    """
+    Token-bucket scheduler for one upstream provider.
+    A call must take a token from every bucket (e.g. per-minute and per-day).
+    Waiting callers are served in priority order, so interactive requests go
+    ahead of background refreshes. Usable from threads and from the event loop.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name: str, buckets: list[TokenBucket]):
+        self.name = name
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+
+    def _max_wait(self, priority: int) -> float:
+        if priority == INTERACTIVE:
+            return settings.RATE_LIMIT_INTERACTIVE_MAX_WAIT
+        return settings.RATE_LIMIT_BACKGROUND_MAX_WAIT
+
+    def _enqueue(self, priority: int) -> tuple[int, int]:
+        ticket = (priority, next(self._counter))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: tuple[int, int]):
+        with self._lock:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+
+    def _try_acquire(self, ticket: tuple[int, int]) -> float:
+        """Take a token if `ticket` is first in line; otherwise return the expected wait"""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in self.buckets:
+                bucket.refill(now)
+
+            wait = max(bucket.wait_time() for bucket in self.buckets)
+            if wait == 0 and self._waiters[0] == ticket:
+                for bucket in self.buckets:
+                    bucket.tokens -= 1
+                heapq.heappop(self._waiters)
+                return 0.0
+
+            return wait or self.POLL_INTERVAL
+
+    def acquire(self, priority: Optional[int] = None):
+        """Block until a token is available or raise RateLimitExceeded"""
+        priority = _priority.get() if priority is None else priority
+        deadline = time.monotonic() + self._max_wait(priority)
+        ticket = self._enqueue(priority)
+
+        while True:
+            wait = self._try_acquire(ticket)
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                self._dequeue(ticket)
+                raise RateLimitExceeded(self.name, wait)
+            time.sleep(min(wait, self.POLL_INTERVAL))
+
+    async def acquire_async(self, priority: Optional[int] = None):
+        """Non-blocking variant of acquire"""
+        priority = _priority.get() if priority is None else priority
+        deadline = time.monotonic() + self._max_wait(priority)
+        ticket = self._enqueue(priority)
+
+        try:
+            while True:
+                wait = self._try_acquire(ticket)
+                if wait == 0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise RateLimitExceeded(self.name, wait)
+                await asyncio.sleep(min(wait, self.POLL_INTERVAL))
+        except BaseException:
+            # Covers timeouts and task cancellation
+            self._dequeue(ticket)
+            raise
+
+    def exhaust(self, period: float = 60.0):
+        """
+        Empty the buckets after the provider reported a limit we did not see coming
+        (e.g. quota shared with another process). Calls resume after roughly `period`,
+        which may be hours when a daily quota is used up.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for bucket in self.buckets:
+                bucket.refill(now)
+                bucket.tokens = min(bucket.tokens, 1 - period * bucket.rate)
+
+
+alphavantage_limiter = ProviderRateLimiter('Alpha Vantage', [
+    TokenBucket(settings.ALPHAVANTAGE_REQUESTS_PER_MINUTE, 60),
+    TokenBucket(settings.ALPHAVANTAGE_REQUESTS_PER_DAY, 86400),
+])
+
+coingecko_limiter = ProviderRateLimiter('CoinGecko', [
+    TokenBucket(settings.COINGECKO_REQUESTS_PER_MINUTE, 60),
+])
+
+yahoo_limiter = ProviderRateLimiter('Yahoo Finance', [
+    TokenBucket(settings.YAHOO_REQUESTS_PER_MINUTE, 60),
+])
@@ -0,0 +1,361 @@
+import math
+import numpy as np
+from collections import deque
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date, timedelta
+from app.models.indicator_state import IndicatorState
+from app.services.price_history_service import PriceHistoryService
+from app.services.technical_analysis import TechnicalAnalysisService
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def week_id(day: date) -> int:
+    """Monday-based week number, matching TechnicalAnalysisService.weekly_closes"""
+    return (day.toordinal() - _EPOCH_ORDINAL + 3) // 7
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO with O(1) append, replace-last and access from the end"""
+
+    def __init__(self, capacity: int, values: Optional[list] = None):
+        self.capacity = capacity
+        self.items = [0.0] * capacity
+        self.start = 0
+        self.size = 0
+        for value in (values or [])[-capacity:]:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def from_end(self, k: int) -> float:
+        """k-th most recent value (k=1 is the last one)"""
+        return self.items[(self.start + self.size - k) % self.capacity]
+
+    def append(self, value: float) -> Optional[float]:
+        """Add a value, returning the evicted one when full"""
+        if self.size < self.capacity:
+            self.items[(self.start + self.size) % self.capacity] = value
+            self.size += 1
+            return None
+
+        evicted = self.items[self.start]
+        self.items[self.start] = value
+        self.start = (self.start + 1) % self.capacity
+        return evicted
+
+    def replace_last(self, value: float) -> float:
+        index = (self.start + self.size - 1) % self.capacity
+        old = self.items[index]
+        self.items[index] = value
+        return old
+
+    def to_list(self) -> list:
+        """Values oldest first"""
+        return [self.from_end(k) for k in range(self.size, 0, -1)]
+
+
+class MonotonicExtrema:
+    """
+    Highest high and lowest low over the last `days` calendar days.
+    Monotonic deques only keep bars that can still become the extreme,
+    so both push and query are amortized O(1). The latest bar is held apart
+    until a later day arrives, so a provisional bar can be revised either way.
+    """
+
+    def __init__(self, days: int):
+        self.days = days
+        self.highs = deque()  # (ordinal, high) with strictly decreasing highs, before `current`
+        self.lows = deque()  # (ordinal, low) with strictly increasing lows, before `current`
+        self.current: Optional[tuple] = None  # (ordinal, high, low) of the latest bar
+
+    def push(self, day: int, high: float, low: float):
+        """Add the bar for `day` (a date ordinal, not older than the last push); a repeated day replaces it"""
+        if self.current is not None and self.current[0] != day:
+            last_day, last_high, last_low = self.current
+            while self.highs and self.highs[-1][1] <= last_high:
+                self.highs.pop()
+            self.highs.append((last_day, last_high))
+
+            while self.lows and self.lows[-1][1] >= last_low:
+                self.lows.pop()
+            self.lows.append((last_day, last_low))
+        self.current = (day, high, low)
+
+        # Window covers (day - days, day], like TechnicalAnalysisService.compute_range
+        cutoff = day - self.days
+        while self.highs and self.highs[0][0] <= cutoff:
+            self.highs.popleft()
+        while self.lows and self.lows[0][0] <= cutoff:
+            self.lows.popleft()
+
+    def high(self) -> Optional[float]:
+        if self.current is None:
+            return None
+        return max(self.highs[0][1], self.current[1]) if self.highs else self.current[1]
+
+    def low(self) -> Optional[float]:
+        if self.current is None:
+            return None
+        return min(self.lows[0][1], self.current[2]) if self.lows else self.current[2]
+
+    def to_dict(self) -> dict:
+        return {
+            'highs': [list(item) for item in self.highs],
+            'lows': [list(item) for item in self.lows],
+            'current': list(self.current) if self.current else None,
+        }
+
+    @classmethod
+    def from_dict(cls, days: int, data: dict) -> 'MonotonicExtrema':
+        extrema = cls(days)
+        extrema.highs = deque((day, value) for day, value in data['highs'])
+        extrema.lows = deque((day, value) for day, value in data['lows'])
+        extrema.current = tuple(data['current']) if data.get('current') else None
+        return extrema
+
+
+class RollingIndicatorState:
+    """
+    Running sums over the daily MA windows and the 200-week window, plus
+    high/low extrema for each range lookback.
+    Each new daily bar updates every indicator in O(1); a repeated date
+    (today's provisional bar) replaces the previous value instead.
+    """
+
+    # Bump when the serialized layout changes; older states are rebuilt
+    VERSION = 3
+
+    DAILY_CAPACITY = max(TechnicalAnalysisService.DAILY_WINDOWS.values())
+
+    def __init__(self):
+        self.daily = RingBuffer(self.DAILY_CAPACITY)
+        self.daily_sums = {name: 0.0 for name in TechnicalAnalysisService.DAILY_WINDOWS}
+        self.weekly = RingBuffer(TechnicalAnalysisService.WEEKLY_WINDOW)
+        self.weekly_sum = 0.0
+        self.extrema = {
+            weeks: MonotonicExtrema(weeks * 7) for weeks in TechnicalAnalysisService.RANGE_LOOKBACK_WEEKS
+        }
+        self.first_date: Optional[date] = None
+        self.last_date: Optional[date] = None
+        self.last_week: Optional[int] = None
+
+    def push(self, day: date, close: float, high: Optional[float] = None, low: Optional[float] = None) -> bool:
+        """
+        Fold one daily bar into the state (missing high/low fall back to the close).
+        Returns False for a bar older than the state, which requires a rebuild.
+        """
+        if self.last_date is not None and day < self.last_date:
+            return False
+
+        ordinal = day.toordinal()
+        for extrema in self.extrema.values():
+            extrema.push(ordinal, close if high is None else high, close if low is None else low)
+
+        if day == self.last_date:
+            old = self.daily.replace_last(close)
+            for name in self.daily_sums:
+                self.daily_sums[name] += close - old
+        else:
+            for name, window in TechnicalAnalysisService.DAILY_WINDOWS.items():
+                leaving = self.daily.from_end(window) if len(self.daily) >= window else 0.0
+                self.daily_sums[name] += close - leaving
+            self.daily.append(close)
+
+        week = week_id(day)
+        if week == self.last_week:
+            self.weekly_sum += close - self.weekly.replace_last(close)
+        else:
+            self.weekly_sum += close - (self.weekly.append(close) or 0.0)
+
+        if self.first_date is None:
+            self.first_date = day
+        self.last_date = day
+        self.last_week = week
+        return True
+
+    def moving_averages(self) -> dict:
+        result = {}
+        for name, window in TechnicalAnalysisService.DAILY_WINDOWS.items():
+            result[name] = self.daily_sums[name] / window if len(self.daily) >= window else None
+
+        weeks = TechnicalAnalysisService.WEEKLY_WINDOW
+        result['ma_200_week'] = self.weekly_sum / weeks if len(self.weekly) >= weeks else None
+        return result
+
+    def price_range(self, weeks: int, current_price: float) -> dict:
+        """High/low over a tracked lookback; nulls unless history covers all of it"""
+        extrema = self.extrema[weeks]
+        covered = self.first_date is not None and self.first_date <= self.last_date - timedelta(weeks=weeks)
+        high = extrema.high() if covered else None
+        low = extrema.low() if covered else None
+
+        return {
+            'weeks': weeks,
+            'high': high,
+            'low': low,
+            'current_price': current_price,
+            'position_percent': (
+                TechnicalAnalysisService.range_position(high, low, current_price) if covered else None
+            ),
+        }
+
+    def high_low_range(self, current_price: float) -> dict:
+        """The 52-week range in the StockData layout"""
+        result = self.price_range(TechnicalAnalysisService.RANGE_WEEKS, current_price)
+        return {
+            'week_52_high': result['high'],
+            'week_52_low': result['low'],
+            'current_price': current_price,
+            'position_percent': result['position_percent'],
+        }
+
+    def price_ranges(self, current_price: float) -> list[dict]:
+        return [self.price_range(weeks, current_price) for weeks in self.extrema]
+
+    def _resum(self):
+        """Recompute running sums exactly from the buffers (clears float drift)"""
+        closes = self.daily.to_list()
+        for name, window in TechnicalAnalysisService.DAILY_WINDOWS.items():
+            self.daily_sums[name] = math.fsum(closes[-window:])
+        self.weekly_sum = math.fsum(self.weekly.to_list())
+
+    @classmethod
+    def from_arrays(cls, dates, closes, highs, lows, weekly=None) -> 'RollingIndicatorState':
+        """
+        Build state from engine arrays (oldest first).
+        `weekly` holds pre-aggregated weekly closes; by default they are derived from the daily bars.
+        """
+        state = cls()
+        if len(closes) == 0:
+            return state
+
+        if weekly is None:
+            weekly = TechnicalAnalysisService.weekly_closes(dates, closes)
+        state.daily = RingBuffer(cls.DAILY_CAPACITY, closes[-cls.DAILY_CAPACITY:].tolist())
+        state.weekly = RingBuffer(TechnicalAnalysisService.WEEKLY_WINDOW, weekly[-TechnicalAnalysisService.WEEKLY_WINDOW:].tolist())
+        state.first_date = dates[0].astype(object)
+        state.last_date = dates[-1].astype(object)
+        state.last_week = week_id(state.last_date)
+        state._resum()
+
+        # Extrema only need bars inside the longest lookback
+        cutoff = dates[-1] - np.timedelta64(max(state.extrema) * 7, 'D')
+        start = int(np.searchsorted(dates, cutoff, side='right'))
+        ordinals = (dates[start:].astype(np.int64) + _EPOCH_ORDINAL).tolist()
+        for ordinal, high, low in zip(ordinals, highs[start:].tolist(), lows[start:].tolist()):
+            for extrema in state.extrema.values():
+                extrema.push(ordinal, high, low)
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            'version': self.VERSION,
+            'daily': self.daily.to_list(),
+            'weekly': self.weekly.to_list(),
+            'extrema': {str(weeks): extrema.to_dict() for weeks, extrema in self.extrema.items()},
+            'first_date': self.first_date.isoformat() if self.first_date else None,
+            'last_date': self.last_date.isoformat() if self.last_date else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Optional['RollingIndicatorState']:
+        """Restore a serialized state; None if it was written by an older layout"""
+        if data.get('version') != cls.VERSION:
+            return None
+
+        state = cls()
+        state.daily = RingBuffer(cls.DAILY_CAPACITY, data['daily'])
+        state.weekly = RingBuffer(TechnicalAnalysisService.WEEKLY_WINDOW, data['weekly'])
+        state.extrema = {
+            weeks: MonotonicExtrema.from_dict(weeks * 7, data['extrema'][str(weeks)])
+            for weeks in TechnicalAnalysisService.RANGE_LOOKBACK_WEEKS
+            if str(weeks) in data['extrema']
+        }
+        if len(state.extrema) != len(TechnicalAnalysisService.RANGE_LOOKBACK_WEEKS):
+            return None
+
+        if data.get('first_date'):
+            state.first_date = date.fromisoformat(data['first_date'])
+        if data.get('last_date'):
+            state.last_date = date.fromisoformat(data['last_date'])
+            state.last_week = week_id(state.last_date)
+        state._resum()
+        return state
+
+
+class IndicatorStateService:
+    """Persists RollingIndicatorState per symbol and keeps it in step with price_history"""
+
+    # Daily bars needed to rebuild the daily windows and every range lookback;
+    # the 200-week MA is rebuilt from weekly closes
+    REBUILD_LOOKBACK = timedelta(weeks=max(TechnicalAnalysisService.RANGE_LOOKBACK_WEEKS) + 1)
+
+    @staticmethod
+    def load(db: Session, symbol: str) -> Optional[RollingIndicatorState]:
+        row = db.get(IndicatorState, symbol)
+        return RollingIndicatorState.from_dict(row.state) if row else None
+
+    @staticmethod
+    def save(db: Session, symbol: str, state: RollingIndicatorState):
+        row = db.get(IndicatorState, symbol)
+        if row is None:
+            row = IndicatorState(symbol=symbol)
+            db.add(row)
+        row.last_date = state.last_date
+        row.state = state.to_dict()
+        db.commit()
+
+    @staticmethod
+    def invalidate(db: Session, symbol: str):
+        """Drop stored state so the next refresh rebuilds it from price_history"""
+        db.query(IndicatorState).filter(IndicatorState.symbol == symbol).delete()
+        db.commit()
+
+    @staticmethod
+    def rebuild(db: Session, symbol: str) -> Optional[RollingIndicatorState]:
+        """Recreate state from stored bars"""
+        last_date = PriceHistoryService.get_last_date(db, symbol)
+        if not last_date:
+            return None
+
+        arrays = PriceHistoryService.load_arrays(db, symbol, since=last_date - IndicatorStateService.REBUILD_LOOKBACK)
+        weekly = PriceHistoryService.load_weekly_closes(db, symbol, TechnicalAnalysisService.WEEKLY_WINDOW)
+        return RollingIndicatorState.from_arrays(*arrays, weekly=weekly)
+
+    @staticmethod
+    def advance(db: Session, symbol: str, new_bars: list[dict]) -> Optional[RollingIndicatorState]:
+        """
+        Fold newly stored bars into the persisted state in O(1) per bar.
+        Rebuilds from price_history when the state is missing or outdated, when the bars
+        do not continue from the state's last day, or when so many bars arrived that a rebuild is cheaper.
+        """
+        state = IndicatorStateService.load(db, symbol)
+
+        if state is not None and len(new_bars) > RollingIndicatorState.DAILY_CAPACITY:
+            state = None
+
+        # Fetches are trimmed to start at the last stored day; any other first bar means
+        # the state missed stored bars (e.g. an earlier save failed)
+        if state is not None and new_bars and (
+            state.last_date is None or new_bars[0]['date'] != state.last_date.isoformat()
+        ):
+            state = None
+
+        if state is not None:
+            for bar in new_bars:
+                if not state.push(date.fromisoformat(bar['date']), bar['close'], bar.get('high'), bar.get('low')):
+                    state = None
+                    break
+
+        if state is None:
+            state = IndicatorStateService.rebuild(db, symbol)
+            if state is None:
+                return None
+        elif not new_bars:
+            return state
+
+        IndicatorStateService.save(db, symbol, state)
+        return state
@@ -1,8 +1,7 @@
 import yfinance as yf
-from datetime import datetime, timedelta
 import pandas as pd
 from typing import Optional
-import time
+from app.services.rate_limiter import yahoo_limiter, RateLimitExceeded
 from app.services.crypto_service import CryptoService
 from app.services.alphavantage_service import AlphaVantageService
 
@@ -19,8 +18,7 @@ class StockService:
         period options: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
         """
         try:
-            # Add delay to avoid rate limiting
-            time.sleep(0.5)
+            yahoo_limiter.acquire()
 
             ticker = yf.Ticker(symbol)
             df = ticker.history(period=period)
@@ -29,6 +27,8 @@ class StockService:
                 return None
 
             return df
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching stock data for {symbol}: {e}")
             return None
@@ -44,29 +44,12 @@ class StockService:
         return AlphaVantageService.get_current_price(symbol)
 
     @staticmethod
-    def get_stock_history(symbol: str, days: int = 30) -> list[dict]:
-        """Get historical prices for charting"""
-        try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(start=start_date, end=end_date)
-
-            if df.empty:
-                return []
-
-            prices = []
-            for date, row in df.iterrows():
-                prices.append({
-                    'date': date.isoformat(),
-                    'price': row['Close']
-                })
+    async def get_current_price_async(symbol: str) -> Optional[dict]:
+        """Non-blocking variant of get_current_price"""
+        if StockService.is_crypto(symbol):
+            return await CryptoService.get_current_price_async(symbol)
 
-            return prices
-        except Exception as e:
-            print(f"Error fetching stock history for {symbol}: {e}")
-            return []
+        return await AlphaVantageService.get_current_price_async(symbol)
 
     @staticmethod
     def get_stock_info(symbol: str, asset_type: str) -> Optional[dict]:
@@ -78,6 +61,14 @@ class StockService:
         # Use Alpha Vantage for stocks
         return AlphaVantageService.get_company_overview(symbol)
 
+    @staticmethod
+    async def get_stock_info_async(symbol: str, asset_type: str) -> Optional[dict]:
+        """Non-blocking variant of get_stock_info"""
+        if asset_type.upper() == 'CRYPTO' or StockService.is_crypto(symbol):
+            return CryptoService.get_crypto_info(symbol)
+
+        return await AlphaVantageService.get_company_overview_async(symbol)
+
     @staticmethod
     def validate_symbol(symbol: str) -> bool:
         """Check if symbol exists (routes crypto to CoinGecko, stocks to Alpha Vantage)"""
@@ -87,3 +78,11 @@ class StockService:
 
         # Use Alpha Vantage for stocks
         return AlphaVantageService.validate_symbol(symbol)
+
+    @staticmethod
+    async def validate_symbol_async(symbol: str) -> bool:
+        """Non-blocking variant of validate_symbol"""
+        if StockService.is_crypto(symbol):
+            return CryptoService.validate_symbol(symbol)
+
+        return await AlphaVantageService.validate_symbol_async(symbol)
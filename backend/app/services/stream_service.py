@@ -0,0 +1,141 @@
+import asyncio
+import json
+from typing import Optional
+import redis.asyncio as aioredis
+from app.services.cache_service import cache_service
+from app.config import get_settings
+
+settings = get_settings()
+
+# Fresh StockData payloads from any worker are published here
+UPDATES_CHANNEL = "stock_updates"
+
+
+def diff_payload(previous: Optional[dict], current: dict) -> dict:
+    """Top-level fields of `current` that differ from `previous` (all of them if there is none)"""
+    if previous is None:
+        return dict(current)
+    return {key: value for key, value in current.items() if previous.get(key) != value}
+
+
+class StreamBroker:
+    """
+    Fans StockData updates out to streaming clients of this worker.
+    One Redis subscription per worker receives updates from every worker; each update
+    is diffed and serialized once per symbol and shared by all of that symbol's subscribers.
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._last: dict[str, Optional[dict]] = {}  # Diff base per symbol; None sends the full payload
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def publish(self, symbol: str, data: dict):
+        """Announce a fresh analysis; callable from request handlers and scheduler threads"""
+        if cache_service.enabled:
+            try:
+                cache_service.redis_client.publish(UPDATES_CHANNEL, json.dumps(data, default=str))
+                return
+            except Exception as e:
+                print(f"Stream publish error: {e}")
+
+        # Without Redis only this worker's clients can be reached
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, symbol, json.loads(json.dumps(data, default=str)))
+
+    def subscribe(self, symbols: list[str]) -> asyncio.Queue:
+        """
+        Register a client queue for `symbols`.
+        Events arrive as (event, json) tuples; None means the stream must be closed.
+        """
+        self._ensure_listener()
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, symbols: list[str], queue: asyncio.Queue):
+        for symbol in symbols:
+            queues = self._subscribers.get(symbol)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[symbol]
+                self._last.pop(symbol, None)
+
+    def subscribed_symbols(self) -> list[str]:
+        """Symbols at least one client of this worker is streaming"""
+        return list(self._subscribers)
+
+    def remember(self, symbol: str, data: dict):
+        """Seed the diff base with the snapshot a client was just sent"""
+        if symbol not in self._last:
+            self._last[symbol] = data
+        elif self._last[symbol] != data:
+            # Clients now hold different versions; send the next update in full so both catch up
+            self._last[symbol] = None
+
+    def _dispatch(self, symbol: str, data: dict):
+        queues = self._subscribers.get(symbol)
+        if not queues:
+            return
+
+        changes = diff_payload(self._last.get(symbol), data)
+        self._last[symbol] = data
+        if not changes:
+            return
+
+        changes['symbol'] = symbol
+        event = ('update', json.dumps(changes))
+        for queue in list(queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(queue)
+
+    def _evict(self, queue: asyncio.Queue):
+        """Slow client: drop its backlog and end its stream; it reconnects with a fresh snapshot"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        for queues in self._subscribers.values():
+            queues.discard(queue)
+
+    def _ensure_listener(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if cache_service.enabled and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        """Receive updates from every worker over Redis pub/sub, reconnecting on errors"""
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(UPDATES_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] != 'message':
+                            continue
+                        data = json.loads(message['data'])
+                        self._dispatch(data['symbol'], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Stream listener error: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                await client.aclose()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+
+# Global broker instance
+stream_broker = StreamBroker()
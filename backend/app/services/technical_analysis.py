@@ -5,72 +5,172 @@ from datetime import datetime, timedelta
 
 
 class TechnicalAnalysisService:
+    # Daily simple moving averages (window in trading bars)
+    DAILY_WINDOWS = {
+        'ma_50': 50,
+        'ma_100': 100,
+        'ma_150': 150,
+        'ma_200_day': 200,
+    }
+
+    # 200-week MA is taken over true weekly closes (last close of each Monday-based week)
+    WEEKLY_WINDOW = 200
+
+    # 52-week range covers the calendar year before the latest bar, for every asset type
+    RANGE_WEEKS = 52
+
+    # Lookbacks (in weeks) tracked incrementally and served by /api/stocks/{symbol}/ranges
+    RANGE_LOOKBACK_WEEKS = (13, 26, 52, 104)
+
     @staticmethod
-    def calculate_moving_averages(df: pd.DataFrame) -> Dict[str, Optional[float]]:
+    def rows_to_arrays(rows: list) -> tuple:
         """
-        Calculate moving averages: 50, 100, 150, 200-day, and 200-week
+        Convert (epoch_day, close, high, low) rows, oldest first, into contiguous
+        datetime64[D] / float64 arrays consumed by the engine
         """
-        if df is None or df.empty:
-            return {
-                'ma_50': None,
-                'ma_100': None,
-                'ma_150': None,
-                'ma_200_day': None,
-                'ma_200_week': None,
-            }
+        if not rows:
+            empty = np.array([], dtype=np.float64)
+            return np.array([], dtype='datetime64[D]'), empty, empty, empty
+
+        days, closes, highs, lows = zip(*rows)
+        closes = np.array(closes, dtype=np.float64)
+        # Missing highs/lows (e.g. crypto) fall back to the close
+        highs = np.array(highs, dtype=np.float64)
+        lows = np.array(lows, dtype=np.float64)
+        np.copyto(highs, closes, where=np.isnan(highs))
+        np.copyto(lows, closes, where=np.isnan(lows))
+        return np.array(days, dtype=np.int64).astype('datetime64[D]'), closes, highs, lows
+
+    @staticmethod
+    def weekly_closes(dates: np.ndarray, closes: np.ndarray) -> np.ndarray:
+        """Last close of each Monday-based week"""
+        if len(closes) == 0:
+            return closes
 
-        close_prices = df['Close']
+        # 1970-01-01 was a Thursday; shifting by 3 days puts week boundaries on Monday
+        weeks = (dates.astype(np.int64) + 3) // 7
+        last_in_week = np.flatnonzero(np.diff(weeks))
+        return closes[np.append(last_in_week, len(closes) - 1)]
 
+    @staticmethod
+    def compute_moving_averages(dates: np.ndarray, closes: np.ndarray) -> Dict[str, Optional[float]]:
+        """
+        Every daily window from a single cumulative-sum pass, plus the 200-week MA
+        """
+        n = len(closes)
         result = {}
 
-        # Calculate daily moving averages
-        if len(close_prices) >= 50:
-            result['ma_50'] = close_prices.rolling(window=50).mean().iloc[-1]
-        else:
-            result['ma_50'] = None
+        if n:
+            csum = np.cumsum(closes)
+            total = csum[-1]
+        for name, window in TechnicalAnalysisService.DAILY_WINDOWS.items():
+            if n >= window:
+                window_sum = total - csum[n - window - 1] if n > window else total
+                result[name] = float(window_sum / window)
+            else:
+                result[name] = None
 
-        if len(close_prices) >= 100:
-            result['ma_100'] = close_prices.rolling(window=100).mean().iloc[-1]
+        weekly = TechnicalAnalysisService.weekly_closes(dates, closes)
+        if len(weekly) >= TechnicalAnalysisService.WEEKLY_WINDOW:
+            result['ma_200_week'] = float(weekly[-TechnicalAnalysisService.WEEKLY_WINDOW:].mean())
         else:
-            result['ma_100'] = None
+            result['ma_200_week'] = None
 
-        if len(close_prices) >= 150:
-            result['ma_150'] = close_prices.rolling(window=150).mean().iloc[-1]
-        else:
-            result['ma_150'] = None
+        return result
 
-        if len(close_prices) >= 200:
-            result['ma_200_day'] = close_prices.rolling(window=200).mean().iloc[-1]
-        else:
-            result['ma_200_day'] = None
+    @staticmethod
+    def compute_range(
+        dates: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        current_price: float,
+        weeks: int = RANGE_WEEKS,
+    ) -> Dict[str, Optional[float]]:
+        """
+        High/low over the `weeks` before the latest bar and the current position in that range.
+        Returns nulls unless history covers the whole lookback.
+        """
+        empty = {
+            'week_52_high': None,
+            'week_52_low': None,
+            'current_price': current_price,
+            'position_percent': None,
+        }
+        if len(dates) == 0:
+            return empty
 
-        # Calculate 200-week MA (approximately 1000 trading days)
-        week_window = 1000
-        if len(close_prices) >= week_window:
-            result['ma_200_week'] = close_prices.rolling(window=week_window).mean().iloc[-1]
-        else:
-            result['ma_200_week'] = None
+        cutoff = dates[-1] - np.timedelta64(weeks * 7, 'D')
+        if dates[0] > cutoff:
+            return empty
 
-        return result
+        start = int(np.searchsorted(dates, cutoff, side='right'))
+        week_52_high = float(highs[start:].max())
+        week_52_low = float(lows[start:].min())
+
+        return {
+            'week_52_high': week_52_high,
+            'week_52_low': week_52_low,
+            'current_price': current_price,
+            'position_percent': TechnicalAnalysisService.range_position(week_52_high, week_52_low, current_price),
+        }
 
     @staticmethod
-    def get_52_week_range(df: pd.DataFrame, current_price: float) -> Dict[str, Optional[float]]:
+    def range_position(high: float, low: float, current_price: float) -> float:
+        """Position of the current price in a high/low range (0-100%)"""
+        price_range = high - low
+        if price_range > 0:
+            return ((current_price - low) / price_range) * 100
+        return 50.0
+
+    @staticmethod
+    def compute_indicators(
+        dates: np.ndarray,
+        closes: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        current_price: float,
+    ) -> dict:
+        """Moving averages and 52-week range for daily bars (stocks and crypto alike)"""
+        return {
+            'moving_averages': TechnicalAnalysisService.compute_moving_averages(dates, closes),
+            'high_low_range': TechnicalAnalysisService.compute_range(dates, highs, lows, current_price),
+        }
+
+    @staticmethod
+    def _frame_to_arrays(df: pd.DataFrame) -> tuple:
+        """Convert a yfinance history frame into the engine's arrays"""
+        index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+        dates = index.values.astype('datetime64[D]')
+        return (
+            dates,
+            df['Close'].to_numpy(dtype=np.float64),
+            df['High'].to_numpy(dtype=np.float64),
+            df['Low'].to_numpy(dtype=np.float64),
+        )
+
+    @staticmethod
+    def calculate_moving_averages(df: pd.DataFrame) -> Dict[str, Optional[float]]:
         """
-        Get 52-week high/low and current position in that range
+        Calculate moving averages: 50, 100, 150, 200-day, and 200-week
         """
         if df is None or df.empty:
             return {
-                'week_52_high': None,
-                'week_52_low': None,
-                'current_price': current_price,
-                'position_percent': None,
+                'ma_50': None,
+                'ma_100': None,
+                'ma_150': None,
+                'ma_200_day': None,
+                'ma_200_week': None,
             }
 
-        # Get last 52 weeks (approximately 252 trading days)
-        lookback_days = 252
-        recent_data = df.tail(lookback_days)
+        dates, closes, _, _ = TechnicalAnalysisService._frame_to_arrays(df)
+        return TechnicalAnalysisService.compute_moving_averages(dates, closes)
 
-        if recent_data.empty:
+    @staticmethod
+    def get_52_week_range(df: pd.DataFrame, current_price: float) -> Dict[str, Optional[float]]:
+        """
+        Get 52-week high/low and current position in that range
+        """
+        if df is None or df.empty:
             return {
                 'week_52_high': None,
                 'week_52_low': None,
@@ -78,33 +178,24 @@ class TechnicalAnalysisService:
                 'position_percent': None,
             }
 
-        week_52_high = recent_data['High'].max()
-        week_52_low = recent_data['Low'].min()
-
-        # Calculate position in range (0-100%)
-        position_percent = None
-        if week_52_high and week_52_low and week_52_high != week_52_low:
-            position_percent = ((current_price - week_52_low) / (week_52_high - week_52_low)) * 100
-
-        return {
-            'week_52_high': week_52_high,
-            'week_52_low': week_52_low,
-            'current_price': current_price,
-            'position_percent': position_percent,
-        }
+        dates, _, highs, lows = TechnicalAnalysisService._frame_to_arrays(df)
+        return TechnicalAnalysisService.compute_range(dates, highs, lows, current_price)
 
     @staticmethod
     def get_full_analysis(df: pd.DataFrame, current_price: float) -> dict:
         """
-        Get complete technical analysis including MAs and 52-week range
+        Get complete technical analysis including MAs and 52-week range.
+        Full-history batch path; live quotes are served incrementally by RollingIndicatorState.
         """
-        moving_averages = TechnicalAnalysisService.calculate_moving_averages(df)
-        high_low_range = TechnicalAnalysisService.get_52_week_range(df, current_price)
+        if df is None or df.empty:
+            return {
+                'moving_averages': TechnicalAnalysisService.calculate_moving_averages(df),
+                'high_low_range': TechnicalAnalysisService.get_52_week_range(df, current_price),
+            }
 
-        return {
-            'moving_averages': moving_averages,
-            'high_low_range': high_low_range,
-        }
+        return TechnicalAnalysisService.compute_indicators(
+            *TechnicalAnalysisService._frame_to_arrays(df), current_price
+        )
 
     @staticmethod
     def calculate_ma_signals(current_price: float, moving_averages: dict) -> dict:
@@ -0,0 +1,106 @@
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+from app.services.crypto_service import CryptoService
+from app.config import get_settings
+
+settings = get_settings()
+
+# Symbol lists, one symbol per line ('#' starts a comment). The refresh task writes
+# to the cache directory; the snapshot bundled with the source is the fallback.
+BUNDLED_DIR = Path(__file__).resolve().parent.parent / "data" / "tickers"
+CACHE_DIR = Path(settings.TICKER_CACHE_DIR)
+EQUITIES = "equities.txt"
+CRYPTO = "crypto.txt"
+
+# Cashtags ($AAPL, $BRK.B) and bare uppercase words, in one pass
+CANDIDATE_PATTERN = re.compile(r'(\$)?\b([A-Z]{1,5}(?:\.[A-Z])?)\b')
+
+# Real symbols that are also everyday words or trading jargon; they only count as a cashtag.
+# The universe lists every US listing, so common words have to be ruled out here.
+AMBIGUOUS_WORDS = frozenset({
+    'A', 'AGO', 'AI', 'ALL', 'AM', 'AN', 'ANY', 'APP', 'ARE', 'AS', 'AT', 'BE', 'BEAT', 'BEST', 'BIG',
+    'BULL', 'BUY', 'BY', 'C', 'CAN', 'CASH', 'CAT', 'CEO', 'D', 'DD', 'DIS', 'DO', 'DTE', 'DYOR', 'EAT',
+    'EL', 'EOD', 'EOS', 'EPS', 'ETF', 'EU', 'EV', 'EVER', 'F', 'FAST', 'FCF', 'FIVE', 'FOR', 'FREE',
+    'FUN', 'FUND', 'GDP', 'GO', 'GOLD', 'GOOD', 'HAS', 'HE', 'HODL', 'HOLD', 'HOME', 'HOPE', 'HUGE',
+    'IMO', 'IPO', 'IRS', 'IT', 'KEY', 'KEYS', 'LIFE', 'LONG', 'LOVE', 'LOW', 'MA', 'ME', 'MOON', 'MY',
+    'NEAR', 'NET', 'NEW', 'NEXT', 'NICE', 'NOW', 'O', 'ODD', 'OK', 'ON', 'ONE', 'OPEN', 'OR', 'OUT',
+    'PATH', 'PLAY', 'PM', 'PT', 'PUMP', 'REAL', 'RUN', 'S', 'SAFE', 'SEE', 'SELL', 'SO', 'T', 'TEAM',
+    'TECH', 'TEN', 'TOP', 'TRUE', 'U', 'UK', 'UP', 'USA', 'V', 'W', 'WAY', 'WELL', 'WOW', 'YOU',
+    # Time zones after clock times ("8:30 AM ET")
+    'BST', 'CDT', 'CET', 'CST', 'CT', 'EDT', 'EST', 'ET', 'GMT', 'MDT', 'MST', 'MT', 'PDT', 'PST', 'UTC',
+})
+
+# Coins the app quotes (BTC, ETH, LINK, ...) always mean the coin, even where a stock uses the symbol
+TRACKED_COINS = frozenset(symbol.removesuffix('-USD') for symbol in CryptoService.SYMBOL_MAP)
+
+
+def _read_symbols(path: Path) -> frozenset:
+    with open(path) as f:
+        return frozenset(
+            line.strip().upper()
+            for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+
+class TickerUniverse:
+    """
+    In-memory set of known equity and crypto symbols, loaded from the refreshed lists
+    when they exist and from the bundled snapshot otherwise.
+    Lookups never touch the network; the lists are reloaded when the refresh task rewrites them.
+    """
+
+    def __init__(self, bundled_dir: Path = BUNDLED_DIR, cache_dir: Path = CACHE_DIR):
+        self.bundled_dir = bundled_dir
+        self.cache_dir = cache_dir
+        self.equities: frozenset = frozenset()
+        self.crypto: frozenset = frozenset()
+        self._sources: Optional[tuple] = None
+        self.reload_if_changed()
+
+    def path_for(self, name: str) -> Path:
+        """The refreshed copy of a list if there is one, else the bundled snapshot"""
+        cached = self.cache_dir / name
+        return cached if cached.exists() else self.bundled_dir / name
+
+    def reload_if_changed(self):
+        """Re-read the symbol lists if they were rewritten (or first refreshed) since the last load"""
+        paths = (self.path_for(EQUITIES), self.path_for(CRYPTO))
+        sources = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+        if sources == self._sources:
+            return
+        self.equities = _read_symbols(paths[0])
+        self.crypto = _read_symbols(paths[1])
+        self._sources = sources
+
+    def __len__(self) -> int:
+        return len(self.equities | self.crypto)
+
+    def symbols_for(self, token: str, cashtag: bool = False) -> List[str]:
+        """
+        App symbols for a candidate token; empty if it is not a known ticker.
+        Crypto is returned in watchlist form (BTC-USD). Where a stock and a coin share a
+        symbol, coins the app quotes win, a bare word means the stock, and a cashtag
+        ($SUI) is reported as both since either is meant on different feeds.
+        """
+        if not cashtag and (len(token) < 2 or token in AMBIGUOUS_WORDS):
+            return []
+        coin = f"{token}-USD" if token in self.crypto or token in TRACKED_COINS else None
+        if token not in self.equities or token in TRACKED_COINS:
+            return [coin] if coin else []
+        if coin and cashtag:
+            return [token, coin]
+        return [token]
+
+    def extract(self, text: str) -> List[str]:
+        """Known tickers mentioned in text, sorted and de-duplicated"""
+        found = set()
+        for match in CANDIDATE_PATTERN.finditer(text):
+            found.update(self.symbols_for(match.group(2), cashtag=match.group(1) is not None))
+        return sorted(found)
+
+
+# Global universe, loaded once per process
+ticker_universe = TickerUniverse()
@@ -0,0 +1,23 @@
+"""
+The OCR job run in worker processes. Spawned workers import this module to
+unpickle the job, so it only pulls in Tesseract, PIL and the ticker lists;
+no database engine or Redis connection is created in a worker.
+"""
+from app.services.ocr_service import ocr_service
+from app.services.ticker_universe import ticker_universe
+
+
+def run_ocr(image_path: str) -> dict:
+    """Tesseract plus ticker/thesis extraction; runs in a worker process"""
+    try:
+        extracted_text = ocr_service.extract_text_from_screenshot(image_path, raise_errors=True)
+    except Exception as e:
+        # Some pytesseract errors cannot be unpickled, which would break the whole pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    # Worker processes outlive the weekly refresh of the symbol lists
+    ticker_universe.reload_if_changed()
+    return {
+        'extracted_text': extracted_text,
+        'tickers_mentioned': ocr_service.extract_tickers(extracted_text),
+        'investment_thesis': ocr_service.extract_investment_thesis(extracted_text),
+    }
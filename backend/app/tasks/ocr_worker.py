@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from app.config import get_settings
+from app.database.session import SessionLocal
+from app.models.screenshots import Screenshot
+from app.services.cache_service import cache_service
+from app.tasks.ocr_job import run_ocr
+
+settings = get_settings()
+
+# OCR job states stored in Screenshot.ocr_status
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Keeps running jobs referenced until they finish
+_jobs: set[asyncio.Task] = set()
+
+# Workers starting within this many seconds of each other count as one restart
+RESUME_LOCK_TTL = 120
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Forking a process that runs an event loop and holds DB/Redis connections is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _update(screenshot_id: int, **fields):
+    db = SessionLocal()
+    try:
+        db.query(Screenshot).filter(Screenshot.id == screenshot_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim(screenshot_id: int) -> bool:
+    """Move a pending job to processing; False if another worker already took it"""
+    db = SessionLocal()
+    try:
+        claimed = (
+            db.query(Screenshot)
+            .filter(Screenshot.id == screenshot_id, Screenshot.ocr_status == PENDING)
+            .update({'ocr_status': PROCESSING}, synchronize_session=False)
+        )
+        db.commit()
+        return claimed == 1
+    finally:
+        db.close()
+
+
+async def _process(screenshot_id: int, image_path: str):
+    if not await asyncio.to_thread(_claim, screenshot_id):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_pool(), run_ocr, image_path)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # A worker died (e.g. out of memory); start a fresh pool for the next job
+            shutdown_ocr_pool()
+        print(f"OCR failed for screenshot {screenshot_id}: {e}")
+        await asyncio.to_thread(_update, screenshot_id, ocr_status=FAILED, ocr_error=str(e)[:500])
+        return
+
+    await asyncio.to_thread(_update, screenshot_id, ocr_status=DONE, ocr_error=None, **result)
+
+
+def enqueue_ocr(screenshot_id: int, image_path: str):
+    """Run OCR for a stored screenshot in the process pool; progress is tracked in ocr_status"""
+    task = asyncio.create_task(_process(screenshot_id, image_path))
+    _jobs.add(task)
+    task.add_done_callback(_jobs.discard)
+
+
+def resume_pending_ocr():
+    """
+    Re-enqueue jobs interrupted by a restart. Runs in every API worker: only the first
+    to start hands interrupted jobs back to the queue, and each job is claimed atomically.
+    """
+    db = SessionLocal()
+    try:
+        # The lease is left to expire so workers starting alongside it skip this step
+        if cache_service.acquire_lock("ocr_resume", ttl=RESUME_LOCK_TTL):
+            db.query(Screenshot).filter(Screenshot.ocr_status == PROCESSING).update(
+                {'ocr_status': PENDING}, synchronize_session=False
+            )
+            db.commit()
+
+        pending = (
+            db.query(Screenshot.id, Screenshot.image_path)
+            .filter(Screenshot.ocr_status == PENDING)
+            .all()
+        )
+    finally:
+        db.close()
+
+    for screenshot_id, image_path in pending:
+        enqueue_ocr(screenshot_id, image_path)
+    if pending:
+        print(f"Resumed {len(pending)} OCR jobs")
+
+
+def shutdown_ocr_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,117 @@
+"""
+Refresh the ticker universe from the NASDAQ Trader symbol directories
+(every US-listed stock and ETF) and CoinGecko's largest coins by market cap.
+Lists are written to TICKER_CACHE_DIR, never over the snapshot bundled with the source.
+
+Runs weekly from the scheduler, or by hand:
+
+    cd backend
+    python -m app.tasks.refresh_tickers
+"""
+import os
+import re
+from pathlib import Path
+from app.services.http_client import get_sync_session
+from app.services.crypto_service import CryptoService
+from app.services.ticker_universe import ticker_universe, EQUITIES, CRYPTO
+from app.config import get_settings
+
+settings = get_settings()
+
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+
+# Coins ranked by market cap; the long tail is mostly noise for screenshots
+CRYPTO_PAGES = 2
+CRYPTO_PER_PAGE = 250
+
+# Plain symbols and share classes; skips preferreds and units written with punctuation (ABR$D, ACAH=U)
+SYMBOL_PATTERN = re.compile(r'^[A-Z]{1,5}(?:\.[A-Z])?$')
+
+# Refuse to replace a list with one this much smaller (truncated download, format change)
+MIN_KEEP_RATIO = 0.5
+
+
+def _parse_symbol_directory(text: str, symbol_column: str) -> set:
+    """Symbols from a pipe-delimited NASDAQ Trader file, without test issues"""
+    lines = text.strip().splitlines()
+    header = lines[0].split('|')
+    symbol_index = header.index(symbol_column)
+    test_index = header.index('Test Issue')
+
+    symbols = set()
+    for line in lines[1:]:
+        if line.startswith('File Creation Time'):
+            continue
+        fields = line.split('|')
+        if fields[test_index] == 'Y':
+            continue
+        symbol = fields[symbol_index].strip().upper()
+        if SYMBOL_PATTERN.match(symbol):
+            symbols.add(symbol)
+    return symbols
+
+
+def fetch_equities() -> set:
+    session = get_sync_session()
+    symbols = set()
+    for url, column in ((NASDAQ_LISTED_URL, 'Symbol'), (OTHER_LISTED_URL, 'ACT Symbol')):
+        response = session.get(url, timeout=settings.HTTP_TIMEOUT)
+        response.raise_for_status()
+        symbols |= _parse_symbol_directory(response.text, column)
+    return symbols
+
+
+def fetch_crypto() -> set:
+    symbols = set()
+    for page in range(1, CRYPTO_PAGES + 1):
+        coins = CryptoService._request("/coins/markets", {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': CRYPTO_PER_PAGE,
+            'page': page,
+        })
+        for coin in coins:
+            symbol = coin['symbol'].upper()
+            if SYMBOL_PATTERN.match(symbol):
+                symbols.add(symbol)
+    return symbols
+
+
+def _write_symbols(name: str, symbols: set, description: str):
+    """Replace a symbol list atomically so readers never see a partial file"""
+    current = ticker_universe.equities if name == EQUITIES else ticker_universe.crypto
+    if len(symbols) < len(current) * MIN_KEEP_RATIO:
+        raise ValueError(f"refusing to shrink {name} from {len(current)} to {len(symbols)} symbols")
+
+    path = ticker_universe.cache_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(f"# {description} symbols; written by `python -m app.tasks.refresh_tickers`\n")
+        f.write('\n'.join(sorted(symbols)) + '\n')
+    os.replace(tmp_path, path)
+
+
+def refresh_ticker_universe() -> dict:
+    """Download fresh symbol lists into the cache directory and reload them"""
+    counts = {}
+    for name, fetch, description in (
+        (EQUITIES, fetch_equities, "Listed equity and ETF"),
+        (CRYPTO, fetch_crypto, "Cryptocurrency"),
+    ):
+        try:
+            symbols = fetch()
+            _write_symbols(name, symbols, description)
+            counts[Path(name).stem] = len(symbols)
+        except Exception as e:
+            # Keep the previous list; extraction keeps working offline
+            print(f"Ticker universe refresh failed for {name}: {e}")
+
+    ticker_universe.reload_if_changed()
+    print(f"Ticker universe refreshed: {counts or 'no changes'}")
+    return counts
+
+
+if __name__ == '__main__':
+    refresh_ticker_universe()
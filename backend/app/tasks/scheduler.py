@@ -1,20 +1,112 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Optional
+from sqlalchemy.sql import func
+import time
 from app.config import get_settings
+from app.database.session import SessionLocal
+from app.models.watchlist import Watchlist
+from app.models.moving_averages import MovingAverage
+from app.services.analysis_service import analysis_service
+from app.services.stock_service import StockService
+from app.services.crypto_service import CryptoService
+from app.services.rate_limiter import background_priority
+from app.tasks.refresh_tickers import refresh_ticker_universe
 
 settings = get_settings()
 scheduler = BackgroundScheduler()
 
 
-def daily_price_update():
+def _store_moving_averages(db, symbol: str, data: dict):
+    """Upsert today's MovingAverage row for a symbol"""
+    today = date.today()
+    row = (
+        db.query(MovingAverage)
+        .filter(MovingAverage.symbol == symbol, func.date(MovingAverage.calculated_at) == today)
+        .first()
+    )
+    if row is None:
+        row = MovingAverage(symbol=symbol)
+        db.add(row)
+    else:
+        row.calculated_at = func.now()
+
+    for field, value in data['moving_averages'].items():
+        setattr(row, field, value)
+    row.week_52_high = data['high_low_range']['week_52_high']
+    row.week_52_low = data['high_low_range']['week_52_low']
+
+    db.commit()
+
+
+def refresh_symbol(symbol: str, quote: Optional[dict] = None):
+    """Fetch new bars, recompute indicators, warm the cache and store them for one symbol"""
+    # Goes through the same lease/single-flight as API requests, which also cache and publish it
+    data = analysis_service.refresh_blocking(symbol, quote)
+    if not data:
+        raise ValueError("no current price available")
+
+    db = SessionLocal()
+    try:
+        _store_moving_averages(db, symbol, data)
+    finally:
+        db.close()
+
+
+def daily_price_update() -> dict:
     """
     Update prices for all watchlist items
     Runs daily at configured hour (default 6 AM)
+
+    Symbols are refreshed concurrently (bounded by REFRESH_CONCURRENCY) so the
+    cache is warm before market hours. Returns per-symbol timings and failures.
     """
     print(f"Running daily price update at {settings.DAILY_UPDATE_HOUR}:00...")
-    # This will be implemented in Phase 5
-    # For now, just a placeholder
-    pass
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        symbols = [item.symbol for item in db.query(Watchlist).all()]
+    finally:
+        db.close()
+
+    # All crypto quotes come from one batched CoinGecko call
+    crypto_quotes = {}
+    if any(StockService.is_crypto(s) for s in symbols):
+        try:
+            with background_priority():
+                crypto_quotes = CryptoService.get_current_prices()
+        except Exception as e:
+            print(f"Batched crypto quotes failed, falling back to per-symbol: {e}")
+
+    timings = {}
+    failures = {}
+
+    def run(symbol: str):
+        symbol_started = time.perf_counter()
+        try:
+            # Runs at background priority, so interactive requests are served first
+            refresh_symbol(symbol, crypto_quotes.get(symbol))
+        except Exception as e:
+            failures[symbol] = str(e)
+        timings[symbol] = time.perf_counter() - symbol_started
+
+    with ThreadPoolExecutor(max_workers=settings.REFRESH_CONCURRENCY) as executor:
+        list(executor.map(run, symbols))
+
+    for symbol in symbols:
+        status = f"FAILED ({failures[symbol]})" if symbol in failures else "ok"
+        print(f"  {symbol}: {timings[symbol]:.2f}s {status}")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Daily price update finished in {elapsed:.2f}s: "
+        f"{len(symbols) - len(failures)} refreshed, {len(failures)} failed"
+    )
+
+    return {'elapsed': elapsed, 'timings': timings, 'failures': failures}
 
 
 def start_scheduler():
@@ -32,6 +124,19 @@ def start_scheduler():
             replace_existing=True
         )
 
+        # Keep the ticker universe used by screenshot OCR current with new listings
+        scheduler.add_job(
+            refresh_ticker_universe,
+            CronTrigger(
+                day_of_week='sun',
+                hour=settings.DAILY_UPDATE_HOUR,
+                minute=30,
+                timezone=settings.TIMEZONE
+            ),
+            id='refresh_ticker_universe',
+            replace_existing=True
+        )
+
         scheduler.start()
         print(f"Scheduler started. Daily updates at {settings.DAILY_UPDATE_HOUR}:00 {settings.TIMEZONE}")
 
@@ -0,0 +1,41 @@
+"""
+Keeps streamed symbols current. Clients no longer poll, so each worker
+periodically revalidates the symbols its SSE clients subscribe to once their
+cached analysis expires; the results reach clients through the stream broker.
+"""
+import asyncio
+from typing import Optional
+from app.config import get_settings
+from app.services.analysis_service import analysis_service
+from app.services.stream_service import stream_broker
+
+settings = get_settings()
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _revalidate_loop():
+    while True:
+        await asyncio.sleep(settings.STREAM_REVALIDATE_INTERVAL)
+        symbols = stream_broker.subscribed_symbols()
+        if not symbols:
+            continue
+        try:
+            # Bounded by REVALIDATE_CONCURRENCY and shared with other workers through the lease
+            analysis_service.revalidate_expired(symbols)
+        except Exception as e:
+            print(f"Stream revalidation error: {e}")
+
+
+def start_stream_refresh():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_revalidate_loop())
+        print(f"Streamed symbols revalidated every {settings.STREAM_REVALIDATE_INTERVAL}s")
+
+
+def stop_stream_refresh():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -0,0 +1,80 @@
+"""
+Benchmark: bulk AI analysis against the local API stub.
+
+Runs BATCH analyses through AIAnalysisService at several concurrency limits
+and reports wall time, the stub's peak in-flight requests, and the worst
+event-loop stall seen meanwhile (the old synchronous client stalled the loop
+for the full API latency on every call). No API key or database needed.
+
+    cd backend
+    python -m benchmarks.bench_ai_bulk
+"""
+import asyncio
+import threading
+import time
+import httpx
+import uvicorn
+from app.services.ai_service import AIAnalysisService
+from benchmarks.stub_anthropic import create_app
+
+PORT = 8765
+LATENCY = 0.5
+BATCH = 20
+CONCURRENCY = (1, 4, 8)
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(LATENCY), host='127.0.0.1', port=PORT, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def max_loop_lag(stop: asyncio.Event) -> float:
+    """Longest delay between 10 ms ticks while the batch runs"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def run_batch(base_url: str, concurrency: int) -> tuple[float, int, float, float]:
+    service = AIAnalysisService(api_key='stub', base_url=base_url, concurrency=concurrency)
+    async with httpx.AsyncClient(base_url=base_url) as stub:
+        await stub.post('/stats/reset')
+
+        stop = asyncio.Event()
+        lag = asyncio.create_task(max_loop_lag(stop))
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            service.deep_analysis(f"Post {i}: $AAPL looks cheap after earnings", ['AAPL'])
+            for i in range(BATCH)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+
+        peak = (await stub.get('/stats')).json()['peak']
+    await service.close()
+
+    assert all('error' not in r for r in results), results[0]
+    return elapsed, peak, await lag, sum(r['cost'] for r in results)
+
+
+async def main():
+    server = start_stub()
+    base_url = f"http://127.0.0.1:{PORT}"
+    print(f"{BATCH} analyses, stub latency {LATENCY:.1f}s")
+    print(f"  {'concurrency':<13}{'wall s':>8}{'peak':>6}{'loop lag ms':>13}")
+    try:
+        for concurrency in CONCURRENCY:
+            elapsed, peak, lag, _ = await run_batch(base_url, concurrency)
+            print(f"  {concurrency:<13}{elapsed:>8.2f}{peak:>6}{lag * 1000:>13.1f}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark: fetching 500 cached StockData payloads.
+
+Compares the previous path (one GET + json.loads per symbol) with get_many
+(MGET + msgpack), cold and with the in-process tier warm. Encoding sizes and
+codec timings are reported even without Redis; the round-trip numbers need
+Redis at REDIS_URL (run `docker-compose up redis` first).
+
+    cd backend
+    python -m benchmarks.bench_cache
+"""
+import json
+import time
+from datetime import datetime
+from app.services import cache_codec
+from app.services.cache_service import cache_service
+
+SYMBOLS = 500
+REPEAT = 20
+
+
+def make_payload(i: int) -> dict:
+    price = 100.0 + i
+    return {
+        'symbol': f"SYM{i}",
+        'name': f"Company {i} Inc.",
+        'current_price': price,
+        'change_24h': 1.2345,
+        'change_24h_percent': 0.987,
+        'moving_averages': {
+            'ma_50': price * 0.98, 'ma_100': price * 0.95, 'ma_150': price * 0.93,
+            'ma_200_day': price * 0.9, 'ma_200_week': price * 0.7,
+        },
+        'high_low_range': {
+            'week_52_high': price * 1.2, 'week_52_low': price * 0.8,
+            'current_price': price, 'position_percent': 50.0,
+        },
+        'price_ranges': [
+            {'weeks': w, 'high': price * 1.1, 'low': price * 0.9, 'current_price': price, 'position_percent': 50.0}
+            for w in (13, 26, 52, 104)
+        ],
+        'last_updated': datetime.now().isoformat(),
+    }
+
+
+def timed(fn) -> float:
+    """Best wall time of REPEAT runs, in ms"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_codec(payloads: dict):
+    json_size = sum(len(json.dumps(v, default=str)) for v in payloads.values())
+    packed = {k: cache_codec.encode(v) for k, v in payloads.items()}
+    packed_size = sum(len(v) for v in packed.values())
+    texts = [json.dumps(v, default=str) for v in payloads.values()]
+
+    print(f"  payload bytes        json {json_size:>9,}   msgpack {packed_size:>9,}")
+    print(f"  decode {SYMBOLS} values  json {timed(lambda: [json.loads(t) for t in texts]):>8.2f} ms"
+          f"   msgpack {timed(lambda: [cache_codec.decode(b) for b in packed.values()]):>8.2f} ms")
+
+
+def bench_redis(payloads: dict):
+    keys = list(payloads)
+    text_client = cache_service.redis_client
+
+    def legacy():
+        return [json.loads(text_client.get(f"{key}:json")) for key in keys]
+
+    def cold():
+        cache_service.local.clear()
+        return cache_service.get_many(keys)
+
+    def warm():
+        return cache_service.get_many(keys)
+
+    for key, value in payloads.items():
+        text_client.setex(f"{key}:json", 600, json.dumps(value, default=str))
+    cache_service.set_many(payloads, ttl=600)
+
+    try:
+        assert len(cold()) == SYMBOLS
+        print(f"  GET + json.loads x{SYMBOLS}    {timed(legacy):>8.2f} ms")
+        print(f"  get_many, L1 cold        {timed(cold):>8.2f} ms")
+        print(f"  get_many, L1 warm        {timed(warm):>8.2f} ms")
+    finally:
+        text_client.delete(*[f"{key}:json" for key in keys])
+        cache_service.binary_client.delete(*keys)
+
+
+def main():
+    payloads = {f"bench:stock_analysis:SYM{i}": make_payload(i) for i in range(SYMBOLS)}
+    print(f"{SYMBOLS} StockData payloads, best of {REPEAT}")
+    bench_codec(payloads)
+
+    if cache_service.enabled:
+        bench_redis(payloads)
+    else:
+        print("  Redis unavailable, skipping round-trip benchmark")
+    cache_service.close()
+
+
+if __name__ == '__main__':
+    main()
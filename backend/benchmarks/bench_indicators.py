@@ -0,0 +1,118 @@
+"""
+Microbenchmark: indicator engine vs. the previous statistics.mean path.
+
+Runs on 20 years of synthetic daily bars, so no database or API key is needed.
+Converting database rows to arrays costs about as much as the legacy path, so
+it is reported on its own: live quotes advance RollingIndicatorState by one bar
+and only a rebuild converts (and runs the full engine over) the history.
+
+    cd backend
+    python -m benchmarks.bench_indicators
+"""
+import statistics
+import timeit
+import numpy as np
+import pandas as pd
+from app.services.technical_analysis import TechnicalAnalysisService
+from app.services.rolling_state import RollingIndicatorState
+
+YEARS = 20
+REPEAT = 200
+
+
+def make_bars(years: int = YEARS) -> list[dict]:
+    """Random-walk business-day bars, oldest first"""
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * 252)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    return [
+        {
+            'date': d.date().isoformat(),
+            'open': float(c),
+            'high': float(c * 1.01),
+            'low': float(c * 0.99),
+            'close': float(c),
+            'volume': 1_000_000.0,
+        }
+        for d, c in zip(dates, closes)
+    ]
+
+
+def legacy_indicators(prices: list, current_price: float) -> dict:
+    """The statistics.mean implementation previously in AlphaVantageService"""
+    close_prices = [p['close'] for p in prices]
+
+    def calc_ma(days):
+        if len(close_prices) >= days:
+            return statistics.mean(close_prices[-days:])
+        return None
+
+    moving_averages = {
+        'ma_50': calc_ma(50),
+        'ma_100': calc_ma(100),
+        'ma_150': calc_ma(150),
+        'ma_200_day': calc_ma(200),
+        'ma_200_week': calc_ma(min(1000, len(close_prices))),
+    }
+
+    recent_prices = prices[-260:]
+    week_52_high = max(p['high'] for p in recent_prices)
+    week_52_low = min(p['low'] for p in recent_prices)
+
+    return {
+        'moving_averages': moving_averages,
+        'high_low_range': {
+            'week_52_high': week_52_high,
+            'week_52_low': week_52_low,
+            'current_price': current_price,
+        },
+    }
+
+
+def bench(label: str, fn) -> float:
+    per_call = min(timeit.repeat(fn, number=REPEAT, repeat=5)) / REPEAT
+    print(f"  {label:<38} {per_call * 1e6:>10.1f} us/call")
+    return per_call
+
+
+def main():
+    bars = make_bars()
+    current_price = bars[-1]['close']
+    # Rows in the shape PriceHistoryService.load_arrays reads from the database (plain Python values)
+    epoch = pd.Timestamp('1970-01-01')
+    rows = [
+        ((pd.Timestamp(b['date']) - epoch).days, b['close'], b['high'], b['low'])
+        for b in bars
+    ]
+    dates, closes, highs, lows = TechnicalAnalysisService.rows_to_arrays(rows)
+    state = RollingIndicatorState.from_arrays(dates, closes, highs, lows)
+    last = bars[-1]
+    last_day = pd.Timestamp(last['date']).date()
+
+    def rolling_update():
+        # Today's provisional bar again: the per-quote work once the state exists
+        state.push(last_day, last['close'], last['high'], last['low'])
+        return state.moving_averages(), state.high_low_range(current_price)
+
+    print(f"{len(bars)} daily bars ({YEARS} years), best of 5 x {REPEAT} calls")
+    legacy = bench("statistics.mean (legacy)", lambda: legacy_indicators(bars, current_price))
+    conversion = bench("row conversion (rebuild only)", lambda: TechnicalAnalysisService.rows_to_arrays(rows))
+    arrays_only = bench(
+        "numpy engine, arrays only",
+        lambda: TechnicalAnalysisService.compute_indicators(dates, closes, highs, lows, current_price),
+    )
+    rolling = bench("rolling state, one bar", rolling_update)
+
+    print(f"  full rebuild (conversion + engine): {legacy / (conversion + arrays_only):.1f}x")
+    print(f"  speedup arrays only:                {legacy / arrays_only:.1f}x")
+    print(f"  speedup rolling update:             {legacy / rolling:.1f}x")
+
+    # Daily windows must agree with the legacy path
+    new = TechnicalAnalysisService.compute_moving_averages(dates, closes)
+    old = legacy_indicators(bars, current_price)['moving_averages']
+    for name in TechnicalAnalysisService.DAILY_WINDOWS:
+        assert abs(new[name] - old[name]) < 1e-6 * old[name], name
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: OCR preprocessing presets on a corpus of sample screenshots.
+
+Reports ms/image and ticker recall (expected tickers that extract_tickers found)
+for every preset in OCR_PRESETS. The corpus is a directory of images plus an
+expected.json mapping file name to the tickers each screenshot mentions:
+
+    {"tweet_dark.png": ["NVDA", "AMD"], "reddit_post.jpg": ["GME", "BTC-USD"]}
+
+Without a corpus, --synthetic renders light and dark mode sample posts at
+retina scale. Needs the tesseract binary on PATH.
+
+    cd backend
+    python -m benchmarks.bench_ocr --corpus benchmarks/ocr_corpus
+    python -m benchmarks.bench_ocr --synthetic 20
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+from app.services.ocr_service import ocr_service, OCR_PRESETS
+
+SAMPLE_TICKERS = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'AMD', 'GOOGL', 'META', 'AMZN', 'PLTR', 'BTC', 'ETH', 'SOL']
+# Expected in the watchlist form extract_tickers reports them in
+SAMPLE_SYMBOLS = {ticker: f"{ticker}-USD" if ticker in ('BTC', 'ETH', 'SOL') else ticker for ticker in SAMPLE_TICKERS}
+
+SAMPLE_LINES = [
+    "Adding more ${0} here, the thesis is intact.",
+    "${0} and ${1} both look undervalued after earnings.",
+    "Price target on {0} raised, catalyst is the next launch.",
+    "Bought the dip in ${0} today. Long term hold.",
+    "Trimmed ${0}, rotating into {1} for the next quarter.",
+]
+
+
+def make_synthetic(directory: Path, count: int) -> dict:
+    """Render `count` posts (alternating light/dark mode, 2x scale); returns expected tickers"""
+    rng = random.Random(42)
+    font = ImageFont.load_default(size=34)
+    expected = {}
+    for i in range(count):
+        dark = i % 2 == 1
+        background, foreground = ((21, 32, 43), (231, 233, 234)) if dark else ((255, 255, 255), (15, 20, 25))
+        image = Image.new('RGB', (2360, 1200), background)
+        draw = ImageDraw.Draw(image)
+
+        tickers = set()
+        y = 160
+        for _ in range(4):
+            line = rng.choice(SAMPLE_LINES)
+            picked = rng.sample(SAMPLE_TICKERS, 2)
+            draw.text((180, y), line.format(*picked), font=font, fill=foreground)
+            # Only tickers the template actually printed count
+            printed = picked if '{1}' in line else picked[:1]
+            tickers.update(SAMPLE_SYMBOLS[t] for t in printed)
+            y += 90
+        # Avatar and action-bar noise around the text, as in real screenshots
+        draw.ellipse((40, 150, 140, 250), fill=(29, 155, 240))
+        draw.rectangle((180, y + 60, 2200, y + 64), fill=(83, 100, 113))
+
+        name = f"synthetic_{i:03d}.png"
+        image.save(directory / name)
+        expected[name] = sorted(tickers)
+    return expected
+
+
+def load_corpus(directory: Path) -> dict:
+    with open(directory / 'expected.json') as f:
+        return json.load(f)
+
+
+def bench_preset(directory: Path, expected: dict, preset: str) -> tuple[float, float, int]:
+    """(ms per image, ticker recall, extra tickers) for one preset"""
+    found_total = expected_total = extra = 0
+    start = time.perf_counter()
+    for name, tickers in expected.items():
+        text = ocr_service.extract_text_from_screenshot(str(directory / name), raise_errors=True, preset=preset)
+        found = set(ocr_service.extract_tickers(text))
+        wanted = {t.upper() for t in tickers}
+        found_total += len(found & wanted)
+        expected_total += len(wanted)
+        extra += len(found - wanted)
+    elapsed = time.perf_counter() - start
+    recall = found_total / expected_total if expected_total else 1.0
+    return elapsed * 1000 / len(expected), recall, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--corpus', type=Path, help="directory with images and expected.json")
+    parser.add_argument('--synthetic', type=int, default=0, help="render this many sample posts instead")
+    parser.add_argument('--presets', nargs='+', default=list(OCR_PRESETS), choices=list(OCR_PRESETS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            directory = args.corpus
+            expected = load_corpus(directory)
+        else:
+            directory = Path(tmp)
+            expected = make_synthetic(directory, args.synthetic or 10)
+
+        print(f"{len(expected)} images from {args.corpus or 'synthetic corpus'}")
+        print(f"  {'preset':<12}{'ms/image':>10}{'recall':>9}{'extra':>7}")
+        for preset in args.presets:
+            ms, recall, extra = bench_preset(directory, expected, preset)
+            print(f"  {preset:<12}{ms:>10.1f}{recall:>8.1%}{extra:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: bulk INSERT ... ON CONFLICT vs. the ORM db.add() path for price bars.
+
+Backfills 20 years of synthetic daily bars for a scratch symbol into the
+database configured by DATABASE_URL (run `docker-compose up postgres` first),
+then re-ingests them to measure the update path. The scratch rows are removed.
+
+    cd backend
+    python -m benchmarks.bench_price_ingest
+"""
+import time
+from app.database.session import SessionLocal, engine
+from app.models import Base
+from app.models.price_history import PriceHistory, upsert_price_bars
+from app.services.price_history_service import PriceHistoryService
+from benchmarks.bench_indicators import make_bars
+
+SYMBOL = '__BENCH__'
+
+
+def to_rows(bars: list[dict]) -> list[dict]:
+    return [
+        {
+            'symbol': SYMBOL,
+            'date': PriceHistoryService._to_datetime(bar['date']),
+            'open': bar['open'],
+            'high': bar['high'],
+            'low': bar['low'],
+            'close': bar['close'],
+            'volume': bar['volume'],
+        }
+        for bar in bars
+    ]
+
+
+def orm_ingest(db, rows: list[dict]):
+    """The previous store_bars: load existing rows, then update or db.add() one at a time"""
+    existing = {
+        row.date: row
+        for row in db.query(PriceHistory)
+        .filter(PriceHistory.symbol == SYMBOL, PriceHistory.date >= min(r['date'] for r in rows))
+        .all()
+    }
+    for values in rows:
+        row = existing.get(values['date'])
+        if row is None:
+            row = PriceHistory(symbol=SYMBOL, date=values['date'])
+            db.add(row)
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            setattr(row, name, values[name])
+    db.commit()
+
+
+def bulk_ingest(db, rows: list[dict]):
+    upsert_price_bars(db, rows)
+    db.commit()
+
+
+def clear(db):
+    db.query(PriceHistory).filter(PriceHistory.symbol == SYMBOL).delete()
+    db.commit()
+    db.expunge_all()
+
+
+def run(label: str, fn, db, rows: list[dict]):
+    clear(db)
+    for phase in ('insert', 'update'):
+        start = time.perf_counter()
+        fn(db, rows)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<6} {phase:<7} {elapsed * 1000:>9.1f} ms  {len(rows) / elapsed:>10,.0f} rows/s")
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    rows = to_rows(make_bars())
+    print(f"{len(rows)} daily bars for one symbol")
+
+    db = SessionLocal()
+    try:
+        run("orm", orm_ingest, db, rows)
+        run("bulk", bulk_ingest, db, rows)
+    finally:
+        clear(db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
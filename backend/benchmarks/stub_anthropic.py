@@ -0,0 +1,72 @@
+"""
+Local stand-in for the Anthropic Messages API.
+
+Answers POST /v1/messages with a canned analysis after a fixed latency, and
+reports the peak number of concurrent requests at GET /stats. Point the app at
+it to exercise AI analysis without an API key or cost:
+
+    cd backend
+    python -m benchmarks.stub_anthropic --port 8001 --latency 2.0
+    ANTHROPIC_BASE_URL=http://localhost:8001 ANTHROPIC_API_KEY=stub uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import uvicorn
+from fastapi import FastAPI, Request
+
+CANNED_ANALYSIS = """Thesis: The post argues the company is undervalued after a strong quarter.
+Key claims: Revenue growth is real, but the margin expansion claim is unproven.
+Risks: Valuation depends on continued growth; competition is intensifying.
+Recommendation: HOLD
+Risk rating: MEDIUM"""
+
+
+def create_app(latency: float = 1.0) -> FastAPI:
+    app = FastAPI(title="Anthropic API stub")
+    state = {'in_flight': 0, 'peak': 0, 'requests': 0}
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        state['requests'] += 1
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            state['in_flight'] -= 1
+
+        prompt = ''.join(m['content'] for m in body['messages'] if isinstance(m['content'], str))
+        return {
+            'id': f"msg_stub_{state['requests']}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': body['model'],
+            'content': [{'type': 'text', 'text': CANNED_ANALYSIS}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(CANNED_ANALYSIS) // 4},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/stats/reset")
+    async def reset():
+        state.update(in_flight=0, peak=0, requests=0)
+        return state
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Anthropic Messages API stub")
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=1.0, help="seconds before each response")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency), host='127.0.0.1', port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
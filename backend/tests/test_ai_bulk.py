@@ -0,0 +1,217 @@
+"""
+Bulk AI analysis against the local Anthropic stub (benchmarks/stub_anthropic.py).
+No API key or Postgres needed: screenshots live in an in-memory SQLite database
+(ARRAY columns stored as JSON), and the AI result cache is bypassed.
+
+    cd backend
+    python -m pytest tests
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api import screenshots
+from app.database.session import get_db
+from app.models.screenshots import Screenshot
+from app.services import analysis_cache as analysis_cache_module
+from app.services.ai_service import AIAnalysisService
+from app.tasks import ocr_worker
+from benchmarks.stub_anthropic import create_app
+
+LATENCY = 0.2
+
+# SQLite has no arrays; store them as JSON text and read them back as lists
+sqlite3.register_adapter(list, json.dumps)
+sqlite3.register_converter("JSON", json.loads)
+
+
+@compiles(ARRAY, "sqlite")
+def _array_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+# One ticker per screenshot id, so no two posts share a cache fingerprint
+TICKERS = ['AAPL', 'MSFT', 'NVDA', 'AMD', 'TSLA', 'META', 'AMZN', 'GOOGL', 'PLTR', 'NFLX']
+
+
+def post(screenshot_id: int) -> str:
+    return f"${TICKERS[screenshot_id]} looks cheap after earnings"
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    # Port 0: the OS picks a free port, so parallel runs do not collide
+    server = uvicorn.Server(uvicorn.Config(create_app(LATENCY), host='127.0.0.1', port=0, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def stub_stats(stub_url):
+    httpx.post(f"{stub_url}/stats/reset")
+    return lambda: httpx.get(f"{stub_url}/stats").json()
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={'check_same_thread': False, 'detect_types': sqlite3.PARSE_DECLTYPES},
+        poolclass=StaticPool,
+    )
+    Screenshot.__table__.create(engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    # Results are saved from worker threads through the module's own sessions
+    monkeypatch.setattr(screenshots, 'SessionLocal', factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def add_screenshots(session_factory):
+    def add(*rows: dict):
+        db = session_factory()
+        try:
+            for row in rows:
+                db.add(Screenshot(**{
+                    'image_path': f"uploads/{row['id']}.png",
+                    'ocr_status': ocr_worker.DONE,
+                    'extracted_text': post(row['id']),
+                    'tickers_mentioned': [TICKERS[row['id']]],
+                    **row,
+                }))
+            db.commit()
+        finally:
+            db.close()
+    return add
+
+
+@pytest.fixture
+def analyzed(session_factory):
+    """{id: recommendation} of the screenshots that have a saved analysis"""
+    def read():
+        db = session_factory()
+        try:
+            return {
+                row.id: row.recommendation
+                for row in db.query(Screenshot).filter(Screenshot.ai_analyzed.is_(True))
+            }
+        finally:
+            db.close()
+    return read
+
+
+@pytest.fixture
+def client(monkeypatch, stub_url, session_factory):
+    service = AIAnalysisService(api_key='stub', base_url=stub_url, concurrency=2)
+    monkeypatch.setattr(screenshots, 'ai_service', service)
+    monkeypatch.setattr(analysis_cache_module, 'ai_service', service)
+    # The AI result cache has its own Postgres table; every analysis is a miss here
+    monkeypatch.setattr(screenshots.analysis_cache, '_lookup_sync', lambda *args: None)
+    monkeypatch.setattr(screenshots.analysis_cache, '_store_sync', lambda *args: None)
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(screenshots.router, prefix="/api/screenshots")
+    app.dependency_overrides[get_db] = get_test_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_deep_analysis_respects_concurrency_cap(stub_url, stub_stats):
+    async def run():
+        service = AIAnalysisService(api_key='stub', base_url=stub_url, concurrency=3)
+        try:
+            return await asyncio.gather(*(service.deep_analysis(post(i), [TICKERS[i]]) for i in range(10)))
+        finally:
+            await service.close()
+
+    results = asyncio.run(run())
+
+    assert all('error' not in result for result in results)
+    assert all(result['recommendation'] == 'HOLD' for result in results)
+    stats = stub_stats()
+    assert stats['requests'] == 10
+    assert stats['peak'] == 3
+
+
+def test_bulk_analyze_saves_each_result(client, add_screenshots, analyzed, stub_stats):
+    add_screenshots(
+        {'id': 1}, {'id': 2}, {'id': 3}, {'id': 4},
+        {'id': 5, 'ocr_status': ocr_worker.PENDING},
+        {'id': 6, 'extracted_text': "  \n\x0c"},
+        {'id': 7, 'ai_analyzed': True, 'recommendation': 'BUY'},
+    )
+
+    response = client.post("/api/screenshots/analyze", json={'ids': [1, 2, 3, 4, 5, 6, 7, 8]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['analyzed'], body['failed'], body['skipped']) == (4, 0, 4)
+    statuses = {item['id']: item['status'] for item in body['results']}
+    assert statuses == {
+        1: 'analyzed', 2: 'analyzed', 3: 'analyzed', 4: 'analyzed',
+        5: 'skipped', 6: 'skipped', 7: 'skipped', 8: 'skipped',
+    }
+    assert analyzed() == {1: 'HOLD', 2: 'HOLD', 3: 'HOLD', 4: 'HOLD', 7: 'BUY'}
+    assert stub_stats()['peak'] <= 2
+
+
+def test_bulk_analyze_without_ids_skips_empty_text(client, add_screenshots, analyzed, stub_stats):
+    add_screenshots(
+        {'id': 1},
+        {'id': 2, 'extracted_text': ""},
+        {'id': 3, 'extracted_text': " \n "},
+        {'id': 4, 'extracted_text': None},
+        {'id': 5, 'ocr_status': ocr_worker.FAILED},
+        {'id': 6},
+    )
+
+    response = client.post("/api/screenshots/analyze", json={})
+
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [1, 6]
+    assert analyzed() == {1: 'HOLD', 6: 'HOLD'}
+    assert stub_stats()['requests'] == 2
+
+
+def test_bulk_analyze_reports_failures_per_screenshot(client, add_screenshots, analyzed, monkeypatch):
+    add_screenshots({'id': 1}, {'id': 2}, {'id': 3})
+
+    def lookup(normalized, tickers, record_miss=False):
+        if tickers == [TICKERS[2]]:
+            raise RuntimeError("database is unavailable")
+        return None
+
+    monkeypatch.setattr(screenshots.analysis_cache, '_lookup_sync', lookup)
+
+    response = client.post("/api/screenshots/analyze", json={'ids': [1, 2, 3]})
+
+    assert response.status_code == 200
+    items = {item['id']: item for item in response.json()['results']}
+    assert items[2]['status'] == 'failed'
+    assert "database is unavailable" in items[2]['error']
+    assert analyzed() == {1: 'HOLD', 3: 'HOLD'}
@@ -0,0 +1,39 @@
+"""
+Normalization and fingerprints of the AI result cache.
+
+    cd backend
+    python -m pytest tests
+"""
+from app.services.analysis_cache import normalize_text, fingerprint, minhash_signature, similarity
+
+
+def content_key(text: str, tickers: list[str]) -> str:
+    return fingerprint(normalize_text(text), tickers)
+
+
+def test_different_prices_are_different_content():
+    assert content_key("$TSLA price target $150", ['TSLA']) != content_key("$TSLA price target $450", ['TSLA'])
+
+
+def test_different_percentages_are_different_content():
+    assert content_key("$TSLA down 40% this year", ['TSLA']) != content_key("$TSLA down 10% this year", ['TSLA'])
+
+
+def test_recaptures_of_one_post_match():
+    first = "Elon @elon · 5h\n$TSLA to $1.5m per share\n12:41 PM · Jan 17, 2024 · 1.2K Views\n15k likes"
+    second = "Elon @elon · 2d\n$TSLA to $1.5m per share\n9:02 AM · Jan 18, 2024 · 3.4K Views\n21k likes"
+    assert content_key(first, ['TSLA']) == content_key(second, ['TSLA'])
+
+
+def test_dates_are_ignored():
+    assert normalize_text("Posted 3/4/24, updated 2024-01-17") == normalize_text("Posted 3/5/24, updated 2024-01-18")
+
+
+def test_different_tickers_are_different_content():
+    assert content_key("Looks cheap after earnings", ['AAPL']) != content_key("Looks cheap after earnings", ['MSFT'])
+
+
+def test_ocr_noise_stays_similar():
+    text = "Revenue grew 40% while margins expanded; price target $450 by year end. " * 3
+    noisy = text.replace("margins", "rnargins", 1)
+    assert similarity(minhash_signature(normalize_text(text)), minhash_signature(normalize_text(noisy))) >= 0.8
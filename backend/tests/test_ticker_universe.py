@@ -0,0 +1,32 @@
+"""
+Ticker extraction against the bundled symbol lists.
+
+    cd backend
+    python -m pytest tests
+"""
+from app.services.ocr_service import ocr_service
+
+
+def test_cashtags_of_quoted_coins_resolve_to_crypto():
+    assert ocr_service.extract_tickers("$BTC $ETH $XRP $LINK") == ['BTC-USD', 'ETH-USD', 'LINK-USD', 'XRP-USD']
+
+
+def test_bare_quoted_coins_resolve_to_crypto():
+    assert ocr_service.extract_tickers("Stacking BTC and ETH until year end") == ['BTC-USD', 'ETH-USD']
+
+
+def test_cashtag_shared_by_stock_and_coin_reports_both():
+    assert ocr_service.extract_tickers("$SUI breaking out") == ['SUI', 'SUI-USD']
+    assert ocr_service.extract_tickers("$LTC and $TRX") == ['LTC', 'LTC-USD', 'TRX', 'TRX-USD']
+
+
+def test_bare_word_shared_by_stock_and_coin_means_the_stock():
+    assert ocr_service.extract_tickers("DASH delivered a strong quarter") == ['DASH']
+
+
+def test_stocks_and_coins_in_one_post():
+    assert ocr_service.extract_tickers("Rotating out of $NVDA into $SOL, keeping AAPL") == ['AAPL', 'NVDA', 'SOL-USD']
+
+
+def test_time_zones_are_not_tickers():
+    assert ocr_service.extract_tickers("Earnings call at 8:30 AM ET, $MSFT guidance at 4 PM EST") == ['MSFT']
@@ -1,12 +1,41 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/Card';
-import { useScreenshots } from '@/hooks/useScreenshots';
+import { useScreenshots, useScreenshot } from '@/hooks/useScreenshots';
 import { format } from 'date-fns';
 import { Sparkles, Trash2 } from 'lucide-react';
 
+// The history list omits the analysis text; it is loaded when an entry is opened
+const AnalysisText: React.FC<{ screenshotId: number }> = ({ screenshotId }) => {
+  const [open, setOpen] = useState(false);
+  const { data, isLoading } = useScreenshot(screenshotId, open);
+
+  if (!open) {
+    return (
+      <button onClick={() => setOpen(true)} className="text-sm text-primary hover:underline">
+        Show analysis
+      </button>
+    );
+  }
+
+  return (
+    <div className="text-sm p-3 bg-blue-50 rounded whitespace-pre-wrap">
+      {isLoading ? 'Loading...' : data?.ai_analysis}
+    </div>
+  );
+};
+
 export const ScreenshotHistory: React.FC = () => {
-  const { screenshots, analyzeScreenshot, deleteScreenshot, isAnalyzing } =
-    useScreenshots();
+  const {
+    screenshots,
+    analyzeScreenshot,
+    analyzeAll,
+    deleteScreenshot,
+    isAnalyzing,
+    hasMore,
+    loadMore,
+    isLoadingMore,
+  } = useScreenshots();
+  const unanalyzed = screenshots.filter((s) => s.ocr_status === 'done' && !s.ai_analyzed).length;
 
   if (screenshots.length === 0) {
     return (
@@ -26,7 +55,19 @@ export const ScreenshotHistory: React.FC = () => {
   return (
     <Card>
       <CardHeader>
-        <CardTitle>Screenshot History</CardTitle>
+        <div className="flex justify-between items-center">
+          <CardTitle>Screenshot History</CardTitle>
+          {unanalyzed > 1 && (
+            <button
+              onClick={() => analyzeAll()}
+              disabled={isAnalyzing}
+              className="flex items-center gap-2 px-3 py-1 border border-primary text-primary rounded hover:bg-primary/5 disabled:opacity-50 disabled:cursor-not-allowed text-sm"
+            >
+              <Sparkles className="w-4 h-4" />
+              {isAnalyzing ? 'Analyzing...' : 'Analyze all'}
+            </button>
+          )}
+        </div>
       </CardHeader>
       <CardContent>
         <div className="space-y-4">
@@ -40,6 +81,11 @@ export const ScreenshotHistory: React.FC = () => {
                   <div className="text-sm text-muted-foreground mb-1">
                     {format(new Date(screenshot.upload_timestamp), 'PPp')}
                   </div>
+                  {screenshot.near_duplicate_of && (
+                    <div className="text-xs text-amber-700 mb-1">
+                      Similar to an earlier screenshot (#{screenshot.near_duplicate_of})
+                    </div>
+                  )}
                   {screenshot.tickers_mentioned.length > 0 && (
                     <div className="flex gap-2 flex-wrap mb-2">
                       {screenshot.tickers_mentioned.map((ticker) => (
@@ -71,7 +117,13 @@ export const ScreenshotHistory: React.FC = () => {
                 </div>
               )}
 
-              {!screenshot.ai_analyzed ? (
+              {screenshot.ocr_status === 'pending' || screenshot.ocr_status === 'processing' ? (
+                <div className="text-sm text-muted-foreground">Extracting text...</div>
+              ) : screenshot.ocr_status === 'failed' ? (
+                <div className="text-sm text-red-600">
+                  Text extraction failed{screenshot.ocr_error ? `: ${screenshot.ocr_error}` : ''}
+                </div>
+              ) : !screenshot.ai_analyzed ? (
                 <button
                   onClick={() => analyzeScreenshot(screenshot.id)}
                   disabled={isAnalyzing}
@@ -109,14 +161,22 @@ export const ScreenshotHistory: React.FC = () => {
                       Cost: ${screenshot.analysis_cost?.toFixed(4)}
                     </span>
                   </div>
-                  <div className="text-sm p-3 bg-blue-50 rounded whitespace-pre-wrap">
-                    {screenshot.ai_analysis}
-                  </div>
+                  <AnalysisText screenshotId={screenshot.id} />
                 </div>
               )}
             </div>
           ))}
         </div>
+
+        {hasMore && (
+          <button
+            onClick={() => loadMore()}
+            disabled={isLoadingMore}
+            className="mt-4 w-full py-2 border rounded text-sm text-muted-foreground hover:bg-gray-50 disabled:opacity-50"
+          >
+            {isLoadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </CardContent>
     </Card>
   );
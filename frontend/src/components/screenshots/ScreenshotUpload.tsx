@@ -4,7 +4,7 @@ import { useScreenshots } from '@/hooks/useScreenshots';
 import { Upload, X } from 'lucide-react';
 
 export const ScreenshotUpload: React.FC = () => {
-  const { uploadScreenshot, isUploading } = useScreenshots();
+  const { uploadScreenshot, lastUpload, isUploading } = useScreenshots();
   const [dragActive, setDragActive] = useState(false);
 
   const handleDrag = useCallback((e: React.DragEvent) => {
@@ -85,6 +85,20 @@ export const ScreenshotUpload: React.FC = () => {
           </label>
         </div>
 
+        {lastUpload?.duplicate && (
+          <div className="mt-4 text-sm text-amber-700">
+            <p>This screenshot was already uploaded; showing its existing results.</p>
+            {lastUpload.screenshot && lastUpload.screenshot.tickers_mentioned.length > 0 && (
+              <p className="mt-1">Tickers: {lastUpload.screenshot.tickers_mentioned.join(', ')}</p>
+            )}
+            {lastUpload.screenshot?.recommendation && (
+              <p className="mt-1">
+                AI: {lastUpload.screenshot.recommendation} ({lastUpload.screenshot.risk_rating} risk)
+              </p>
+            )}
+          </div>
+        )}
+
         <div className="mt-4 text-sm text-muted-foreground">
           <p>Upload investment advice screenshots from X/Twitter</p>
           <p>Free OCR will extract tickers and key text instantly</p>
@@ -3,18 +3,20 @@ import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/Card';
 import { MovingAverageIndicator } from './MovingAverageIndicator';
 import { HighLowRangeBar } from './HighLowRangeBar';
 import { EditStockDialog } from './EditStockDialog';
-import { useStockData } from '@/hooks/useStockData';
 import { useWatchlist } from '@/hooks/useWatchlist';
+import { StockData } from '@/types/stock';
 import { formatCurrency, formatPercent } from '@/lib/utils';
 import { TrendingUp, TrendingDown, X, Pencil } from 'lucide-react';
 
 interface PriceCardProps {
   symbol: string;
   name: string;
+  data?: StockData;
+  isLoading?: boolean;
+  error?: boolean;
 }
 
-export const PriceCard: React.FC<PriceCardProps> = ({ symbol, name }) => {
-  const { data, isLoading, error } = useStockData(symbol);
+export const PriceCard: React.FC<PriceCardProps> = ({ symbol, name, data, isLoading, error }) => {
   const { removeFromWatchlist, watchlist } = useWatchlist();
   const [isRemoving, setIsRemoving] = useState(false);
   const [isEditDialogOpen, setIsEditDialogOpen] = useState(false);
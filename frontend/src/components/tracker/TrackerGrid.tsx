@@ -1,10 +1,10 @@
 import React, { useState, useMemo } from 'react';
-import { useQueries } from '@tanstack/react-query';
 import { PriceCard } from './PriceCard';
 import { AddStockDialog } from './AddStockDialog';
 import { SearchFilterBar } from './SearchFilterBar';
 import { useWatchlist } from '@/hooks/useWatchlist';
-import { stockService } from '@/services/stockService';
+import { useDashboardData } from '@/hooks/useStockData';
+import { useStockStream } from '@/hooks/useStockStream';
 import { Button } from '@/components/ui/Button';
 import { Plus, ChevronRight, ChevronDown } from 'lucide-react';
 import { SortOption, PerformanceFilter, EnrichedWatchlistItem } from '@/types/filter';
@@ -23,25 +23,23 @@ export const TrackerGrid: React.FC = () => {
   const [performanceFilter, setPerformanceFilter] = useState<PerformanceFilter>('all');
   const [sortBy, setSortBy] = useState<SortOption>('alpha-asc');
 
-  // Fetch stock data for all watchlist items in parallel
-  const stockQueries = useQueries({
-    queries: watchlist.map((item) => ({
-      queryKey: ['stock', item.symbol],
-      queryFn: () => stockService.getStock(item.symbol),
-      refetchInterval: 5 * 60 * 1000,
-      staleTime: 2 * 60 * 1000,
-    })),
-  });
+  // The stream's snapshot loads the whole watchlist and its updates keep it current;
+  // /dashboard is only fetched (and polled) when streaming is unavailable
+  const streamFailed = useStockStream(watchlist.map((item) => item.symbol));
+  const dashboardQuery = useDashboardData(streamFailed);
 
   // Enrich watchlist items with stock data
   const enrichedWatchlist: EnrichedWatchlistItem[] = useMemo(() => {
-    return watchlist.map((item, index) => ({
+    const bySymbol = new Map(
+      (dashboardQuery.data || []).map((stock) => [stock.symbol, stock])
+    );
+    return watchlist.map((item) => ({
       ...item,
-      stockData: stockQueries[index]?.data,
-      isLoading: stockQueries[index]?.isLoading,
-      error: stockQueries[index]?.isError,
+      stockData: bySymbol.get(item.symbol),
+      isLoading: dashboardQuery.isPending,
+      error: dashboardQuery.isError || (dashboardQuery.isSuccess && !bySymbol.has(item.symbol)),
     }));
-  }, [watchlist, stockQueries]);
+  }, [watchlist, dashboardQuery.data, dashboardQuery.isPending, dashboardQuery.isError, dashboardQuery.isSuccess]);
 
   // Apply filters and sorting
   const filteredWatchlist = useMemo(() => {
@@ -266,6 +264,9 @@ export const TrackerGrid: React.FC = () => {
                         key={item.id}
                         symbol={item.symbol}
                         name={item.name}
+                        data={item.stockData}
+                        isLoading={item.isLoading}
+                        error={item.error}
                       />
                     ))}
                   </div>
@@ -1,23 +1,44 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { screenshotService } from '@/services/screenshotService';
 
 export const useScreenshots = () => {
   const queryClient = useQueryClient();
 
-  const screenshotsQuery = useQuery({
+  const screenshotsQuery = useInfiniteQuery({
     queryKey: ['screenshots'],
-    queryFn: screenshotService.getScreenshots,
+    queryFn: ({ pageParam }) => screenshotService.getScreenshots(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    // Poll while OCR jobs are still running in the background
+    refetchInterval: (query) =>
+      query.state.data?.pages.some((page) =>
+        page.items.some((s) => s.ocr_status === 'pending' || s.ocr_status === 'processing')
+      )
+        ? 2000
+        : false,
   });
 
   const uploadMutation = useMutation({
     mutationFn: (file: File) => screenshotService.uploadScreenshot(file),
-    onSuccess: () => {
+    onSuccess: (upload) => {
+      // A duplicate comes with its existing results; no need to fetch them again
+      if (upload.screenshot) {
+        queryClient.setQueryData(['screenshot', upload.id], upload.screenshot);
+      }
       queryClient.invalidateQueries({ queryKey: ['screenshots'] });
     },
   });
 
   const analyzeMutation = useMutation({
     mutationFn: (screenshotId: number) => screenshotService.analyzeScreenshot(screenshotId),
+    onSuccess: (_, screenshotId) => {
+      queryClient.invalidateQueries({ queryKey: ['screenshots'] });
+      queryClient.invalidateQueries({ queryKey: ['screenshot', screenshotId] });
+    },
+  });
+
+  const analyzeAllMutation = useMutation({
+    mutationFn: () => screenshotService.analyzeScreenshots(),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['screenshots'] });
     },
@@ -31,13 +52,27 @@ export const useScreenshots = () => {
   });
 
   return {
-    screenshots: screenshotsQuery.data || [],
+    screenshots: screenshotsQuery.data?.pages.flatMap((page) => page.items) || [],
+    hasMore: screenshotsQuery.hasNextPage,
+    loadMore: screenshotsQuery.fetchNextPage,
+    isLoadingMore: screenshotsQuery.isFetchingNextPage,
     isLoading: screenshotsQuery.isLoading,
     error: screenshotsQuery.error,
     uploadScreenshot: uploadMutation.mutate,
+    lastUpload: uploadMutation.data,
     analyzeScreenshot: analyzeMutation.mutate,
+    analyzeAll: analyzeAllMutation.mutate,
     deleteScreenshot: deleteMutation.mutate,
     isUploading: uploadMutation.isPending,
-    isAnalyzing: analyzeMutation.isPending,
+    isAnalyzing: analyzeMutation.isPending || analyzeAllMutation.isPending,
   };
 };
+
+// Full screenshot with extracted text and AI analysis, fetched when an entry is opened
+export const useScreenshot = (screenshotId: number, enabled = true) => {
+  return useQuery({
+    queryKey: ['screenshot', screenshotId],
+    queryFn: () => screenshotService.getScreenshot(screenshotId),
+    enabled,
+  });
+};
@@ -5,15 +5,29 @@ export const useStockData = (symbol: string) => {
   return useQuery({
     queryKey: ['stock', symbol],
     queryFn: () => stockService.getStock(symbol),
-    refetchInterval: 5 * 60 * 1000, // Refetch every 5 minutes
+    refetchInterval: 5 * 60 * 1000, // Not every symbol is streamed, so keep the slow poll
     staleTime: 2 * 60 * 1000, // Consider data stale after 2 minutes
   });
 };
 
-export const useStockChart = (symbol: string, days: number = 30) => {
+/**
+ * Watchlist StockData. Normally filled by the useStockStream snapshot, so this
+ * only fetches (and slowly polls) /dashboard when the stream is unavailable.
+ */
+export const useDashboardData = (pollingFallback: boolean) => {
   return useQuery({
-    queryKey: ['stockChart', symbol, days],
-    queryFn: () => stockService.getStockChart(symbol, days),
+    queryKey: ['dashboard'],
+    queryFn: stockService.getDashboard,
+    enabled: pollingFallback,
+    refetchInterval: pollingFallback ? 60 * 1000 : false,
+    staleTime: Infinity, // Kept current by useStockStream
+  });
+};
+
+export const useStockChart = (symbol: string, days: number = 30, maxPoints: number = 500) => {
+  return useQuery({
+    queryKey: ['stockChart', symbol, days, maxPoints],
+    queryFn: () => stockService.getStockChart(symbol, days, maxPoints),
     staleTime: 5 * 60 * 1000,
   });
 };
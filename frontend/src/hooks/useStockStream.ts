@@ -0,0 +1,58 @@
+import { useEffect, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { API_BASE_URL } from '@/services/api';
+import { StockData } from '@/types/stock';
+
+/**
+ * Subscribe to server-sent StockData updates for a set of symbols.
+ * The initial snapshot and every later delta are written into the
+ * ['dashboard'] and ['stock', symbol] query caches, replacing polling.
+ * Returns true once the stream cannot be used, so callers can fall back to polling.
+ */
+export const useStockStream = (symbols: string[]): boolean => {
+  const queryClient = useQueryClient();
+  const symbolKey = [...symbols].sort().join(',');
+  const [failed, setFailed] = useState(typeof EventSource === 'undefined');
+
+  useEffect(() => {
+    if (!symbolKey || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(
+      `${API_BASE_URL}/api/stream?symbols=${encodeURIComponent(symbolKey)}`
+    );
+
+    source.addEventListener('snapshot', (event) => {
+      setFailed(false);
+      const snapshot: StockData[] = JSON.parse((event as MessageEvent).data);
+      queryClient.setQueryData(['dashboard'], snapshot);
+      snapshot.forEach((stock) => queryClient.setQueryData(['stock', stock.symbol], stock));
+    });
+
+    source.addEventListener('update', (event) => {
+      const changes: Partial<StockData> & { symbol: string } = JSON.parse((event as MessageEvent).data);
+      const merge = (stock: StockData) =>
+        stock.symbol === changes.symbol ? { ...stock, ...changes } : stock;
+
+      queryClient.setQueryData<StockData[]>(['dashboard'], (current) => {
+        if (!current) return current;
+        if (!current.some((stock) => stock.symbol === changes.symbol)) {
+          return [...current, changes as StockData];
+        }
+        return current.map(merge);
+      });
+      queryClient.setQueryData<StockData>(['stock', changes.symbol], (current) =>
+        current ? merge(current) : undefined
+      );
+    });
+
+    // EventSource reconnects on its own and receives a fresh snapshot;
+    // it only closes for good when the endpoint is unusable (e.g. a proxy rejects it)
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) setFailed(true);
+    };
+
+    return () => source.close();
+  }, [symbolKey, queryClient]);
+
+  return failed;
+};
@@ -14,6 +14,7 @@ export const useWatchlist = () => {
     mutationFn: (item: WatchlistCreate) => watchlistService.addToWatchlist(item),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['watchlist'] });
+      queryClient.invalidateQueries({ queryKey: ['dashboard'] });
     },
   });
 
@@ -29,6 +30,7 @@ export const useWatchlist = () => {
     mutationFn: (symbol: string) => watchlistService.removeFromWatchlist(symbol),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['watchlist'] });
+      queryClient.invalidateQueries({ queryKey: ['dashboard'] });
     },
   });
 
@@ -1,5 +1,11 @@
 import api from './api';
-import { Screenshot, ScreenshotUploadResponse, AIAnalysisResponse } from '@/types/screenshot';
+import {
+  Screenshot,
+  ScreenshotPage,
+  ScreenshotUploadResponse,
+  AIAnalysisResponse,
+  BulkAnalysisResponse,
+} from '@/types/screenshot';
 
 export const screenshotService = {
   uploadScreenshot: async (file: File): Promise<ScreenshotUploadResponse> => {
@@ -19,8 +25,16 @@ export const screenshotService = {
     return response.data;
   },
 
-  getScreenshots: async (): Promise<Screenshot[]> => {
-    const response = await api.get('/api/screenshots');
+  // Without ids, analyzes every screenshot that has text but no analysis yet
+  analyzeScreenshots: async (ids?: number[]): Promise<BulkAnalysisResponse> => {
+    const response = await api.post('/api/screenshots/analyze', { ids: ids ?? null });
+    return response.data;
+  },
+
+  getScreenshots: async (cursor?: string | null, limit = 20): Promise<ScreenshotPage> => {
+    const response = await api.get('/api/screenshots', {
+      params: { limit, ...(cursor ? { cursor } : {}) },
+    });
     return response.data;
   },
 
@@ -7,9 +7,14 @@ export const stockService = {
     return response.data;
   },
 
-  getStockChart: async (symbol: string, days: number = 30): Promise<StockChartData> => {
+  getDashboard: async (): Promise<StockData[]> => {
+    const response = await api.get('/api/watchlist/dashboard');
+    return response.data;
+  },
+
+  getStockChart: async (symbol: string, days: number = 30, maxPoints: number = 500): Promise<StockChartData> => {
     const response = await api.get(`/api/stocks/${symbol}/chart`, {
-      params: { days },
+      params: { days, max_points: maxPoints },
     });
     return response.data;
   },
@@ -1,7 +1,12 @@
+export type OCRStatus = 'pending' | 'processing' | 'done' | 'failed';
+
 export interface Screenshot {
   id: number;
   image_path: string;
   upload_timestamp: string;
+  near_duplicate_of: number | null;
+  ocr_status: OCRStatus;
+  ocr_error: string | null;
   extracted_text: string | null;
   tickers_mentioned: string[];
   investment_thesis: string | null;
@@ -13,12 +18,21 @@ export interface Screenshot {
   analyzed_at: string | null;
 }
 
+// History list entry; extracted_text and ai_analysis come with the full Screenshot
+export type ScreenshotSummary = Omit<Screenshot, 'extracted_text' | 'ai_analysis'>;
+
+export interface ScreenshotPage {
+  items: ScreenshotSummary[];
+  next_cursor: string | null;
+}
+
 export interface ScreenshotUploadResponse {
   id: number;
-  extracted_text: string;
-  tickers_mentioned: string[];
-  investment_thesis: string;
+  ocr_status: OCRStatus;
   upload_timestamp: string;
+  duplicate: boolean;
+  near_duplicate_of: number | null;
+  screenshot: Screenshot | null; // For a duplicate, the existing OCR/AI results
 }
 
 export interface AIAnalysisResponse {
@@ -28,4 +42,23 @@ export interface AIAnalysisResponse {
   risk_rating: string;
   analysis_cost: number;
   analyzed_at: string;
+  cached: boolean;
+}
+
+export interface BulkAnalysisItem {
+  id: number;
+  status: 'analyzed' | 'failed' | 'skipped';
+  recommendation: string | null;
+  risk_rating: string | null;
+  analysis_cost: number | null;
+  cached: boolean;
+  error: string | null;
+}
+
+export interface BulkAnalysisResponse {
+  results: BulkAnalysisItem[];
+  analyzed: number;
+  failed: number;
+  skipped: number;
+  total_cost: number;
 }
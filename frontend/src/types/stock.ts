@@ -13,6 +13,14 @@ export interface HighLowRange {
   position_percent: number | null;
 }
 
+export interface PriceRange {
+  weeks: number;
+  high: number | null;
+  low: number | null;
+  current_price: number;
+  position_percent: number | null;
+}
+
 export interface StockData {
   symbol: string;
   name: string;
@@ -21,6 +29,7 @@ export interface StockData {
   change_24h_percent: number | null;
   moving_averages: MovingAveragesData;
   high_low_range: HighLowRange;
+  price_ranges: PriceRange[];
   last_updated: string;
 }
 